@@ -0,0 +1,115 @@
+"""Round trip benchmark for the places cache
+
+Compares the old EXISTS + GET read pattern against single GET reads and a
+single MGET for a page of places, counting the commands sent to Redis and the
+time taken per page. Requires a local redis-server.
+
+To run this do the following:
+    > redis-server --port 6379
+    > poetry run python -m benchmarks.cache_round_trips -n 50
+"""
+
+import argparse
+import time
+import uuid
+
+import redis
+
+from places.cache.cache import Cache
+from places.cache.keys import build_entity_key
+from places.service.places.models import Place
+
+ROUND_TRIPS = 0
+
+
+def count_round_trips(send):
+    """Wrap Connection.send_packed_command so every write to a socket is counted."""
+
+    def wrapper(self, *args, **kwargs):
+        global ROUND_TRIPS
+        ROUND_TRIPS += 1
+        return send(self, *args, **kwargs)
+
+    return wrapper
+
+
+def make_place(i: int) -> Place:
+    """Build a realistic looking place."""
+    location = {"lat": 40.7 + i / 1000, "lng": -73.9 - i / 1000}
+    return Place(
+        id=str(uuid.uuid4()),
+        business_status="OPERATIONAL",
+        formatted_address=f"{i} Broadway, New York, NY 10001, United States",
+        geometry={
+            "location": location,
+            "viewport": {"northeast": location, "southwest": location},
+        },
+        icon_background_color="#FF9E67",
+        icon_mask_base_uri="https://maps.gstatic.com/mapfiles/place_api/icons/v2/restaurant_pinlet",
+        name=f"Restaurant {i}",
+        place_id=f"ChIJ{uuid.uuid4().hex}",
+        plus_code={"compound_code": "PXQ4+4J New York", "global_code": "87G8PXQ4+4J"},
+        reference=f"ChIJ{uuid.uuid4().hex}",
+        types=["restaurant", "food", "point_of_interest", "establishment"],
+        user_ratings_total=100 + i,
+        price_level=2,
+        rating=4.5,
+    )
+
+
+def measure(name: str, pages: int, fn) -> None:
+    """Run fn once per page and report round trips and latency per page."""
+    global ROUND_TRIPS
+    ROUND_TRIPS = 0
+    start = time.perf_counter()
+    for _ in range(pages):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<24} {ROUND_TRIPS / pages:>8.1f} round trips/page "
+        f"{elapsed / pages * 1000:>8.2f} ms/page"
+    )
+
+
+def run(size: int, pages: int) -> None:
+    """Seed a page of places and compare the read strategies."""
+    cache = Cache()
+    places = [make_place(i) for i in range(size)]
+    cache.set_many_places(places)
+    ids = [place.id for place in places]
+    keys = [build_entity_key(id) for id in ids]
+
+    def exists_then_get():
+        for key in keys:
+            if cache.client.exists(key):
+                cache.client.get(key)
+
+    def single_get():
+        for id in ids:
+            cache.local.clear()
+            cache.get_many_places([id])
+
+    def mget():
+        cache.local.clear()
+        cache.get_many_places(ids)
+
+    redis.connection.Connection.send_packed_command = count_round_trips(
+        redis.connection.Connection.send_packed_command
+    )
+    print(f"page of {size} places, {pages} pages\n")
+    measure("EXISTS + GET (before)", pages, exists_then_get)
+    measure("GET per place", pages, single_get)
+    measure("MGET per page", pages, mget)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark cache round trips")
+    parser.add_argument("-n", "--size", type=int, default=50)
+    parser.add_argument("-p", "--pages", type=int, default=100)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(size=args.size, pages=args.pages)
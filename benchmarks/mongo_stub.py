@@ -0,0 +1,178 @@
+"""Mongo stub for the throughput benchmark
+
+A minimal MongoDB wire protocol server that answers every query with the same
+generated places after a fixed delay, standing in for a remote Mongo so that
+benchmarks/throughput.py measures how many queries the service keeps in flight
+rather than how fast a local mongod is. Writes are acknowledged and dropped.
+
+To run this do the following:
+    > poetry run python -m benchmarks.mongo_stub --latency-ms 20 --places 100
+    > export MONGO_URI="mongodb://localhost:27018/?directConnection=true"
+"""
+
+import argparse
+import asyncio
+import datetime
+import struct
+import uuid
+from typing import Dict, List
+
+import bson
+
+OP_REPLY = 1
+OP_QUERY = 2004
+OP_MSG = 2013
+
+# Commands answered straight away, everything else waits for the latency
+ADMIN_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "buildInfo", "endSessions"}
+
+
+def make_place(i: int) -> Dict:
+    """Build a stored place document."""
+    location = {"lat": 40.7 + i / 1000, "lng": -73.9 - i / 1000}
+    place_id = f"ChIJ{uuid.uuid4().hex}"
+    name = f"Place {i:05d}"
+    return {
+        "_id": bson.ObjectId(),
+        "id": str(uuid.uuid4()),
+        "business_status": "OPERATIONAL",
+        "formatted_address": f"{i} Main St, New York, NY 10014",
+        "geometry": {
+            "location": location,
+            "viewport": {"northeast": location, "southwest": location},
+        },
+        "icon_background_color": "#FF9E67",
+        "icon_mask_base_uri": "https://maps.gstatic.com/mapfiles/place_api/icons/v2/restaurant_pinlet",
+        "name": name,
+        "place_id": place_id,
+        "plus_code": {
+            "compound_code": "PXQ4+4J New York",
+            "global_code": "87G8PXQ4+4J",
+        },
+        "reference": place_id,
+        "types": ["restaurant", "food"],
+        "user_ratings_total": 100 + i,
+        "rating": 4.5,
+        "price_level": 2,
+    }
+
+
+class MongoStub:
+    """Answers the commands the places service sends."""
+
+    def __init__(self, places: List[Dict], latency_ms: float):
+        self.places = sorted(places, key=lambda place: (place["name"], place["id"]))
+        self.latency = latency_ms / 1000
+        self.connections = 0
+
+    def hello(self) -> Dict:
+        return {
+            "ismaster": True,
+            "isWritablePrimary": True,
+            "helloOk": True,
+            "maxBsonObjectSize": 16 * 1024 * 1024,
+            "maxMessageSizeBytes": 48000000,
+            "maxWriteBatchSize": 100000,
+            "localTime": datetime.datetime.now(datetime.timezone.utc),
+            "logicalSessionTimeoutMinutes": 30,
+            "connectionId": self.connections,
+            "minWireVersion": 0,
+            "maxWireVersion": 21,
+            "readOnly": False,
+            "ok": 1.0,
+        }
+
+    async def command(self, body: Dict) -> Dict:
+        """Reply to a command document."""
+        name = next(iter(body))
+        if name in ADMIN_COMMANDS:
+            return (
+                self.hello() if name.lower() in ("hello", "ismaster") else {"ok": 1.0}
+            )
+        await asyncio.sleep(self.latency)
+
+        namespace = f"{body.get('$db', 'test')}.{body[name]}"
+        if name in ("find", "aggregate", "listIndexes"):
+            batch = [] if name == "listIndexes" else self.places
+            return {
+                "cursor": {"id": bson.Int64(0), "ns": namespace, "firstBatch": batch},
+                "ok": 1.0,
+            }
+        if name in ("insert", "update", "delete"):
+            return {"n": 0, "nModified": 0, "ok": 1.0}
+        if name == "count":
+            return {"n": len(self.places), "ok": 1.0}
+        return {"ok": 1.0}
+
+    async def handle(self, reader, writer) -> None:
+        """Serve one client connection until it closes."""
+        self.connections += 1
+        try:
+            while True:
+                header = await reader.readexactly(16)
+                length, request_id, _, op_code = struct.unpack("<iiii", header)
+                payload = await reader.readexactly(length - 16)
+                if op_code == OP_QUERY:
+                    reply = await self.reply_query(payload)
+                    writer.write(self.frame(request_id, OP_REPLY, reply))
+                elif op_code == OP_MSG:
+                    flags = struct.unpack_from("<I", payload)[0]
+                    reply = await self.reply_msg(payload)
+                    if not flags & 2:  # moreToCome, no reply expected
+                        writer.write(self.frame(request_id, OP_MSG, reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def reply_query(self, payload: bytes) -> bytes:
+        """Reply to a legacy OP_QUERY, only used for the initial handshake."""
+        end = payload.index(b"\0", 4)
+        start = end + 1 + 8
+        size = struct.unpack_from("<i", payload, start)[0]
+        body = bson.decode(payload[start : start + size])
+        reply = bson.encode(await self.command(body))
+        return struct.pack("<iqii", 0, 0, 0, 1) + reply
+
+    async def reply_msg(self, payload: bytes) -> bytes:
+        """Reply to an OP_MSG, merging document sequences into the body."""
+        offset, body = 4, {}
+        while offset < len(payload):
+            kind = payload[offset]
+            offset += 1
+            size = struct.unpack_from("<i", payload, offset)[0]
+            if kind == 0:
+                body = {**bson.decode(payload[offset : offset + size]), **body}
+            offset += size
+        return struct.pack("<IB", 0, 0) + bson.encode(await self.command(body))
+
+    @staticmethod
+    def frame(response_to: int, op_code: int, message: bytes) -> bytes:
+        """Prefix a reply with its message header."""
+        return (
+            struct.pack("<iiii", 16 + len(message), 0, response_to, op_code) + message
+        )
+
+
+async def serve(port: int, places: int, latency_ms: float) -> None:
+    """Run the stub until interrupted."""
+    stub = MongoStub([make_place(i) for i in range(places)], latency_ms=latency_ms)
+    server = await asyncio.start_server(stub.handle, "127.0.0.1", port)
+    print(f"Mongo stub on port {port}: {places} places, {latency_ms} ms per query")
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Mongo stub for benchmarks")
+    parser.add_argument("--port", type=int, default=27018)
+    parser.add_argument("--places", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(serve(port=args.port, places=args.places, latency_ms=args.latency_ms))
@@ -0,0 +1,66 @@
+"""Per place decode cost benchmark
+
+Compares building places through the normalising validator against the
+TRUSTED fast path, both from Mongo style dicts and from cached JSON strings.
+
+To run this do the following:
+    > poetry run python -m benchmarks.place_decode -n 10000
+"""
+
+import argparse
+import gc
+import json
+import time
+
+from benchmarks.cache_round_trips import make_place
+from places.service.places.models import TRUSTED, Place
+
+
+def measure(name: str, count: int, fn, repeat: int = 5) -> None:
+    """Run fn repeat times and report the best cost per place."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<36} {best * 1000:>8.1f} ms {best / count * 1e6:>8.2f} us/place")
+
+
+def run(count: int) -> None:
+    """Decode count places with each strategy."""
+    docs = [make_place(i).model_dump() for i in range(count)]
+    encoded = [json.dumps(doc) for doc in docs]
+
+    print(f"decoding {count} places\n")
+    measure("dict: Place(**doc)", count, lambda: [Place(**doc) for doc in docs])
+    measure(
+        "dict: model_validate(TRUSTED)",
+        count,
+        lambda: [Place.model_validate(doc, context=TRUSTED) for doc in docs],
+    )
+    measure(
+        "json: Place(**json.loads(value))",
+        count,
+        lambda: [Place(**json.loads(value)) for value in encoded],
+    )
+    measure(
+        "json: model_validate_json(TRUSTED)",
+        count,
+        lambda: [
+            Place.model_validate_json(value, context=TRUSTED) for value in encoded
+        ],
+    )
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark place decoding")
+    parser.add_argument("-n", "--count", type=int, default=10000)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(count=args.count)
@@ -0,0 +1,97 @@
+"""Search semantics check for the places manager
+
+Inserts a few places into a scratch collection and checks that the indexed word
+search matches what the regex search would: name and address must both match
+(AND, each in its own field), and a word prefix finds the whole word. Requires a
+MongoDB at MONGO_URI, the scratch collection is dropped afterwards.
+
+To run this do the following:
+    > poetry run python -m benchmarks.search_check
+"""
+
+import uuid
+
+from places.service.mongo_utils import get_collection
+from places.service.places.manager import PlacesManager
+from places.service.places.models import Place
+
+COLLECTION = "search_check"
+
+# (name, address) of the scratch places
+PLACES = [
+    ("Joe's Pizza", "7 Carmine St, New York, NY 10014"),
+    ("Joe's Shanghai", "46 Bowery, New York, NY 10013"),
+    ("Di Fara Pizza", "1424 Avenue J, Brooklyn, NY 11230"),
+    ("Brooklyn Joe's Diner", "100 Main St, Queens, NY 11354"),
+]
+
+# (name, address, expected names) for each search
+SEARCHES = [
+    ("joe", "brooklyn", set()),
+    ("joe", "new york", {"Joe's Pizza", "Joe's Shanghai"}),
+    ("piz", None, {"Joe's Pizza", "Di Fara Pizza"}),
+    ("joe's piz", None, {"Joe's Pizza"}),
+    (None, "brook", {"Di Fara Pizza"}),
+    ("brooklyn", None, {"Brooklyn Joe's Diner"}),
+]
+
+
+def make_place(name: str, address: str) -> Place:
+    """Build a place with the given name and address."""
+    location = {"lat": 40.7, "lng": -73.9}
+    return Place(
+        id=str(uuid.uuid4()),
+        business_status="OPERATIONAL",
+        formatted_address=address,
+        geometry={
+            "location": location,
+            "viewport": {"northeast": location, "southwest": location},
+        },
+        icon_background_color="#FF9E67",
+        icon_mask_base_uri="https://maps.gstatic.com/mapfiles/place_api/icons/v2/restaurant_pinlet",
+        name=name,
+        place_id=f"ChIJ{uuid.uuid4().hex}",
+        plus_code={"compound_code": "PXQ4+4J New York", "global_code": "87G8PXQ4+4J"},
+        reference=f"ChIJ{uuid.uuid4().hex}",
+        types=["restaurant"],
+        user_ratings_total=100,
+    )
+
+
+def search(manager: PlacesManager, use_regex: bool, **params) -> set:
+    """Names of the places a search returns."""
+    return {place.name for place in manager.search(use_regex=use_regex, **params)}
+
+
+def run() -> None:
+    """Seed the scratch collection and check every search."""
+    manager = PlacesManager()
+    manager.collection = get_collection(manager.client, COLLECTION)
+    manager.collection.drop()
+    manager.ensure_indexes()
+    try:
+        manager.insert_many([make_place(*place) for place in PLACES])
+        failures = 0
+        for name, address, expected in SEARCHES:
+            words = search(manager, use_regex=False, name=name, address=address)
+            ok = words == expected
+            failures += not ok
+            print(f"{'ok' if ok else 'FAIL':<4} name={name!r} address={address!r}")
+            if not ok:
+                print(f"     expected {sorted(expected)}, got {sorted(words)}")
+
+        # name and address must both match, as they do with the regex search
+        regex = search(manager, use_regex=True, name="joe", address="new york")
+        words = search(manager, use_regex=False, name="joe", address="new york")
+        if regex != words:
+            failures += 1
+            print(f"FAIL word search {sorted(words)} != regex {sorted(regex)}")
+    finally:
+        manager.collection.drop()
+    if failures:
+        raise SystemExit(f"{failures} search checks failed")
+    print("All search checks passed")
+
+
+if __name__ == "__main__":
+    run()
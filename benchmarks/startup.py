@@ -0,0 +1,80 @@
+"""Startup time benchmark for the places service
+
+Imports service.py and runs its lifespan in a fresh interpreter each time, and
+reports how long each took. Importing should not touch the network, and startup
+should be bounded by SERVICE_WARM_UP_TIMEOUT_SECONDS even when Mongo is down.
+
+To run this do the following:
+    > poetry run python -m benchmarks.startup
+    > poetry run python -m benchmarks.startup --mongo-uri mongodb://10.255.255.1 --timeout 2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child interpreter, prints the import and lifespan times as json
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+import service
+imported = time.perf_counter()
+
+async def startup():
+    async with service.app.router.lifespan_context(service.app):
+        pass
+
+asyncio.run(startup())
+print(json.dumps({"import": imported - start, "startup": time.perf_counter() - imported}))
+"""
+
+
+def measure(env: dict) -> dict:
+    """Import and start the service once in a new interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(repeat: int, mongo_uri: str = None, timeout: float = None) -> None:
+    """Run the benchmark and print a summary."""
+    env = dict(os.environ)
+    if mongo_uri:
+        env["MONGO_URI"] = mongo_uri
+    if timeout is not None:
+        env["SERVICE_WARM_UP_TIMEOUT_SECONDS"] = str(timeout)
+
+    runs = [measure(env) for _ in range(repeat)]
+    for phase in ["import", "startup"]:
+        times = sorted(run[phase] * 1000 for run in runs)
+        print(
+            f"{phase:<8} best {times[0]:>8.1f} ms  median "
+            f"{statistics.median(times):>8.1f} ms  worst {times[-1]:>8.1f} ms"
+        )
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark service startup")
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("--mongo-uri", default=None, help="Overrides MONGO_URI")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Overrides SERVICE_WARM_UP_TIMEOUT_SECONDS",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(repeat=args.repeat, mongo_uri=args.mongo_uri, timeout=args.timeout)
@@ -0,0 +1,56 @@
+"""Throughput benchmark for the places service
+
+Fires a fixed number of GET requests at a running service with a given
+concurrency and reports requests/sec and latency percentiles.
+
+To run this do the following:
+    > poetry run uvicorn service:app --workers 1
+    > poetry run python benchmarks/throughput.py --path "/all?force=true" -c 200
+"""
+
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url: str) -> float:
+    """Fetch a url and return the latency in seconds."""
+    start = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run(url: str, requests: int, concurrency: int) -> None:
+    """Run the benchmark and print a summary."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(fetch, [url] * requests))
+    elapsed = time.perf_counter() - start
+
+    print(f"url:         {url}")
+    print(f"requests:    {requests} @ concurrency {concurrency}")
+    print(f"throughput:  {requests / elapsed:.1f} req/s")
+    print(f"p50 latency: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"p95 latency: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark service throughput")
+    parser.add_argument("--host", default="http://localhost:8000")
+    parser.add_argument("--path", default="/all?force=true")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(
+        url=f"{args.host}{args.path}",
+        requests=args.requests,
+        concurrency=args.concurrency,
+    )
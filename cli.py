@@ -1,13 +1,14 @@
-import json
 import os
 import sys
 
 import tabulate
 import typer
 
-from places.google import get_restaurant_info
-from places.google import seed as get_seed_data
+from constants import GOOGLE_MAX_WORKERS, PLACES_MAX_PAGE_SIZE, SEED_CHUNK_SIZE
+from places.google.google import get_restaurant_info
+from places.google.seed import seed as run_seed
 from places.service.places.manager import PlacesManager
+from places.service.places.models import PLACE_VIEWS
 
 app = typer.Typer()
 manager = PlacesManager()
@@ -28,47 +29,62 @@ def seed(
     limit: int = typer.Option(
         None, "--limit", "-l", help="Limit the number of records to seed"
     ),
+    workers: int = typer.Option(
+        GOOGLE_MAX_WORKERS, "--workers", "-w", help="Concurrent Google lookups"
+    ),
+    chunk_size: int = typer.Option(
+        SEED_CHUNK_SIZE,
+        "--chunk-size",
+        "-c",
+        help="Records enriched and inserted at a time",
+    ),
+    restart: bool = typer.Option(
+        False, "--restart", help="Ignore any checkpoint and start from the beginning"
+    ),
 ):
-    """Seed MongoDB with initial data.
+    """Seed MongoDB with initial data, resuming from the last checkpoint.
 
     Args:
         input_file (str, optional): Path to the seed data. Defaults to SEED_DATA.
         limit (int, optional): Limit the number of records to seed. Defaults to None.
+        workers (int, optional): Concurrent Google lookups. Defaults to GOOGLE_MAX_WORKERS.
+        chunk_size (int, optional): Records per chunk. Defaults to SEED_CHUNK_SIZE.
+        restart (bool, optional): Ignore any checkpoint. Defaults to False.
 
     Notes:
         - The seed data should be a json file with the following schema:
             [
                 {
                     "name": "Restaurant Name",
+                    "location": "Optional City"
                 }
             ]
+        - Records without a name are counted as failed.
     """
     # check if seed data exists
     if not os.path.exists(input_file):
         print(f"Seed data not found at {input_file}. Exiting.")
         return
 
-    # check that schema is correct
-    with open(input_file, "r") as f:
-        data = json.load(f)
-        if not all([all(k in d for k in ["name"]) for d in data]):
-            print("Seed data schema is incorrect. Exiting.")
-            return
-
     # fetch already inserted data
     existing = manager.get_property_list("name")
-    print(f"Existing: {existing}")
-
-    # fetch enriched seed data
-    seed_data = get_seed_data(input_file=input_file, existing=existing, limit=limit)
-    if not seed_data:
-        print("No seed data found that hasnt already been inserted. Exiting.")
+    print(f"Existing: {len(existing)} places")
+
+    # enrich and insert seed data a chunk at a time
+    try:
+        report = run_seed(
+            insert=manager.insert_many,
+            input_file=input_file,
+            existing=existing,
+            limit=limit,
+            max_workers=workers,
+            chunk_size=chunk_size,
+            restart=restart,
+        )
+    except ValueError as e:
+        print(f"Seed data schema is incorrect: {e}. Exiting.")
         return
-
-    # insert seed data
-    places = [place["info"] for place in seed_data]
-    manager.insert_many(places)
-    print(f"Inserted {len(places)} places")
+    print(report)
 
 
 @app.command()
@@ -81,16 +97,30 @@ def search(
         None, "--min-rating", help="Minimum rating for the restaurant"
     ),
     exact: bool = typer.Option(False, "--exact", help="Exact match for name"),
+    use_regex: bool = typer.Option(
+        False, "--regex", help="Use the unindexed regex match instead of word search"
+    ),
+    view: str = typer.Option(
+        "summary", "--view", help="Fields to fetch, 'summary' or 'full'"
+    ),
 ):
     """Search for a restaurant by name"""
     # check for name or address
     if not name and not address:
         print("Please provide a name or address")
         raise typer.Abort()
+    if view not in PLACE_VIEWS:
+        print(f"Please provide a view, one of {list(PLACE_VIEWS)}")
+        raise typer.Abort()
 
     # search
     places = manager.search(
-        name=name, address=address, min_rating=min_rating, exact=exact
+        name=name,
+        address=address,
+        min_rating=min_rating,
+        exact=exact,
+        use_regex=use_regex,
+        view=view,
     )
     if not places:
         print("No places found")
@@ -112,16 +142,74 @@ def search(
     print("\nDone!")
 
 
+@app.command()
+def nearby(
+    lat: float = typer.Option(
+        ..., "--lat", min=-90, max=90, help="Latitude to search around"
+    ),
+    lng: float = typer.Option(
+        ..., "--lng", min=-180, max=180, help="Longitude to search around"
+    ),
+    radius: float = typer.Option(
+        1000, "--radius", "-r", help="Maximum distance in meters"
+    ),
+    limit: int = typer.Option(
+        20,
+        "--limit",
+        "-l",
+        min=1,
+        max=PLACES_MAX_PAGE_SIZE,
+        help="Maximum number of places",
+    ),
+):
+    """Search for restaurants near a point, nearest first"""
+    places = manager.nearby(lat=lat, lng=lng, radius=radius, limit=limit)
+    if not places:
+        print("No places found")
+        return
+    print(f"Found {len(places)} places!\n")
+
+    # filter and print results
+    places = [p.dict() for p in places]
+    headers = ["name", "formatted_address", "rating", "distance"]
+    places = [{k: v for k, v in place.items() if k in headers} for place in places]
+    for place in places:
+        place["distance"] = round(place["distance"])
+    print(tabulate.tabulate(places, headers="keys"))
+
+
+@app.command()
+def drop_duplicates():
+    """Drop restaurants with a duplicate place_id, keeping the first stored."""
+    manager.drop_duplicate_place_ids()
+
+
+@app.command()
+def backfill_geo():
+    """Set the GeoJSON point used by nearby on existing restaurants."""
+    manager.backfill_geo()
+
+
+@app.command()
+def backfill_search():
+    """Set the word fields used by search on existing restaurants."""
+    manager.backfill_search_words()
+
+
 @app.command()
 def insert(
     name: str = typer.Argument(..., help="Name of the restaurant"),
     location: str = typer.Argument(..., help="Address of the restaurant"),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Always ask Google, skipping the lookup cache"
+    ),
 ):
     """Add a restaurant to the database.
 
     Args:
         name (str): Name of the restaurant
         location (str): Address of the restaurant
+        no_cache (bool): Skip the Google lookup cache
     """
     # check for name and address
     if not name or not location:
@@ -140,7 +228,9 @@ def insert(
         return
 
     # fetch new place
-    new_place = get_restaurant_info(name=name, location=location)
+    new_place = get_restaurant_info(
+        name=name, location=location, use_cache=not no_cache
+    )
     if not new_place:
         print(f"Could not find '{name}' at '{location}'")
         return
@@ -2,12 +2,83 @@ import os
 
 # REDIS Constants
 REDIS_TTL_SECONDS: int = 60 * 60 * 24
+REDIS_SEARCH_TTL_SECONDS: int = 60 * 15
 REDIS_HOST: str = "localhost"
 REDIS_PORT: int = 6379
 REDIS_DB: int = 0
+REDIS_INVALIDATION_CHANNEL: str = "places:invalidate"
+REDIS_GENERATION_KEY: str = "places:generation"
+
+# Seconds the generation is trusted from memory before it is re-read from Redis,
+# bounds how long a lost invalidation message can serve stale entries
+REDIS_GENERATION_MAX_AGE_SECONDS: int = 5
+
+# Local (in-process) Cache Constants
+LOCAL_CACHE_MAX_SIZE: int = 256
+LOCAL_CACHE_TTL_SECONDS: int = 60
+
+# Places of longer lists (e.g. /all) are not copied into the local tier, where they
+# would evict everything else on every read
+LOCAL_CACHE_MAX_LIST_SIZE: int = 64
 
 # MongoDB Constants
 MONGO_URI: str = os.environ.get("MONGO_URI")
 
+# One client (and connection pool) is shared per process, these tune it
+MONGO_MAX_POOL_SIZE: int = int(os.environ.get("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE: int = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+MONGO_MAX_IDLE_TIME_MS: int = 60 * 1000
+MONGO_CONNECT_TIMEOUT_MS: int = 5 * 1000
+MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5 * 1000
+MONGO_SOCKET_TIMEOUT_MS: int = 30 * 1000
+MONGO_COMPRESSORS: str = os.environ.get("MONGO_COMPRESSORS", "zlib")
+
+# Longest the service waits at startup for Mongo and Redis before serving anyway
+SERVICE_WARM_UP_TIMEOUT_SECONDS: float = float(
+    os.environ.get("SERVICE_WARM_UP_TIMEOUT_SECONDS", 10)
+)
+
+# Documents fetched per cursor round trip when streaming listings
+MONGO_STREAM_BATCH_SIZE: int = 500
+
+# Pagination Constants
+PLACES_MAX_PAGE_SIZE: int = 500
+PLACES_NEXT_PAGE_HEADER: str = "X-Next-After"
+COMMENTS_MAX_PAGE_SIZE: int = 100
+
+# Places counted per /comments/counts request
+COMMENTS_MAX_COUNT_PLACES: int = 500
+
+# Comments written per insert_many by CommentsManager.add_many
+COMMENTS_INSERT_BATCH_SIZE: int = 1000
+
+# Recipes returned by /recipes/search
+RECIPES_SEARCH_LIMIT: int = 20
+RECIPES_SEARCH_MAX_LIMIT: int = 100
+
 # Google API Key
 GOOGLE_API_KEY: str = os.environ.get("GOOGLE_API_KEY")
+
+# Google Places lookups run concurrently when enriching many places
+GOOGLE_MAX_WORKERS: int = int(os.environ.get("GOOGLE_MAX_WORKERS", 8))
+
+# Google Maps client, shared by every lookup in the process
+GOOGLE_BASE_URL: str = os.environ.get("GOOGLE_BASE_URL", "https://maps.googleapis.com")
+GOOGLE_CONNECT_TIMEOUT_SECONDS: float = 3.0
+GOOGLE_READ_TIMEOUT_SECONDS: float = 10.0
+GOOGLE_RETRY_TIMEOUT_SECONDS: int = 30
+GOOGLE_CONNECTION_RETRIES: int = 3
+
+# Google lookup cache, hits are kept far longer than "No results found" misses
+GOOGLE_LOOKUP_TTL_SECONDS: int = 60 * 60 * 24 * 30
+GOOGLE_MISS_TTL_SECONDS: int = 60 * 60 * 24
+GOOGLE_LOOKUP_CACHE_PATH: str = os.environ.get(
+    "GOOGLE_LOOKUP_CACHE_PATH",
+    os.path.expanduser("~/.cache/places/google_lookups.sqlite3"),
+)
+
+# Seeding enriches and inserts this many places at a time, checkpointing after each
+SEED_CHUNK_SIZE: int = 50
+SEED_CHECKPOINT_DIR: str = os.environ.get(
+    "SEED_CHECKPOINT_DIR", os.path.expanduser("~/.cache/places/seed")
+)
@@ -1,13 +1,34 @@
 import json
-from typing import Dict, List, Union
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Tuple, Union
 
 import redis
 
-from constants import REDIS_DB, REDIS_HOST, REDIS_PORT, REDIS_TTL_SECONDS
-from places.service.places.models import Place
+from constants import (
+    LOCAL_CACHE_MAX_LIST_SIZE,
+    LOCAL_CACHE_MAX_SIZE,
+    LOCAL_CACHE_TTL_SECONDS,
+    REDIS_DB,
+    REDIS_GENERATION_KEY,
+    REDIS_GENERATION_MAX_AGE_SECONDS,
+    REDIS_HOST,
+    REDIS_INVALIDATION_CHANNEL,
+    REDIS_PORT,
+    REDIS_TTL_SECONDS,
+)
+from places.cache.keys import build_entity_key
+from places.cache.local import LocalCache
+from places.service.places.models import TRUSTED, Place
 
 redis_client = None
 places_cache = None
+places_cache_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
 
 
 def get_redis_client():
@@ -27,81 +48,335 @@ def get_places_cache():
     """Get a global cache."""
     global places_cache
     if places_cache is None:
-        places_cache = Cache()
+        with places_cache_lock:
+            if places_cache is None:
+                places_cache = Cache()
     return places_cache
 
 
+def _reset_after_fork() -> None:
+    """Forget the client and cache in a forked child, which has neither the
+    parent's connections nor its invalidation subscriber thread"""
+    global redis_client, places_cache, places_cache_lock
+    redis_client = None
+    places_cache = None
+    places_cache_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 class Cache:
+    """Two tier cache, an in-process LRU of validated places in front of Redis.
+
+    Deletes and generation bumps are published on REDIS_INVALIDATION_CHANNEL so
+    that every other process evicts its local copies. Filling the cache after a
+    read publishes nothing, the value it writes is the same one other processes
+    would read. Places are copied in and out of the local tier so callers never
+    share (and mutate) the cached objects.
+
+    Places are normalised: each place is stored once under its id (see
+    build_entity_key), while lookups and lists only store the ids they resolve to
+    and are assembled with a single MGET. Places evicted from a cached list can be
+    fetched on their own (see get_list).
+
+    Lookup and list keys are versioned with a generation counter kept in Redis,
+    any change to the places collection bumps it so every previously cached list
+    is skipped at once and left to expire via its TTL. Callers read the generation
+    before querying the DB and pass it to set_places, so results read before a
+    write are stored under the old generation and never served after it.
+
+    Place keys are not versioned, a bump leaves them in place for the lists built
+    after it to reuse. A place's stored fields do not change once inserted, so a
+    place cached from a read that raced a write is still correct, and deleted
+    places are evicted by id (see evict_places). Refreshing a place rewrites its
+    one entry (see set_many_places).
+    """
+
     client = None
 
     def __init__(self):
         """Initialize the cache."""
         self.client = get_redis_client()
+        self.local = LocalCache(
+            max_size=LOCAL_CACHE_MAX_SIZE, ttl_seconds=LOCAL_CACHE_TTL_SECONDS
+        )
+        self.counters = {
+            "local": {"hits": 0, "misses": 0},
+            "redis": {"hits": 0, "misses": 0},
+        }
+
+        # Generation is tracked in memory, kept current by the listener below and
+        # re-read from Redis every REDIS_GENERATION_MAX_AGE_SECONDS
+        self.generation = None
+        self.generation_read_at = 0.0
+
+        # Listen for invalidations from other processes
+        self.instance_id = str(uuid.uuid4())
+        self.listener = None
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{REDIS_INVALIDATION_CHANNEL: self._on_invalidate})
+            self.listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except redis.RedisError as e:
+            logger.warning(f"Could not subscribe to cache invalidations: {e}")
+
+    # Local Tier and Invalidation Operations
+    def _record(self, tier: str, hit: bool) -> None:
+        """Count a hit or miss against a tier."""
+        self.counters[tier]["hits" if hit else "misses"] += 1
+
+    def _get_local(self, key: str):
+        """Get a value from the local tier, counting the hit or miss."""
+        value = self.local.get(key)
+        self._record("local", value is not None)
+        return value
+
+    def _invalidate(self, key: str = None, pipe=None) -> None:
+        """Evict key (or everything if None) locally and in all other processes.
+
+        If a pipeline is given the publish is queued on it rather than sent.
+        """
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.delete(key)
+        message = json.dumps({"source": self.instance_id, "key": key})
+        if pipe is not None:
+            pipe.publish(REDIS_INVALIDATION_CHANNEL, message)
+            return
+        try:
+            self.client.publish(REDIS_INVALIDATION_CHANNEL, message)
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish cache invalidation for {key}: {e}")
+
+    def _on_invalidate(self, message: Dict) -> None:
+        """Handle an invalidation published by another process."""
+        payload = json.loads(message["data"])
+        if payload["source"] == self.instance_id:
+            return
+        if "generation" in payload:
+            # None means the generation moved, re-read it from Redis when next used
+            generation = payload["generation"]
+            self.generation = (
+                None if generation is None else max(self.generation or 0, generation)
+            )
+        if "keys" in payload:
+            for key in payload["keys"]:
+                self.local.delete(key)
+        elif payload["key"] is None:
+            self.local.clear()
+        else:
+            self.local.delete(payload["key"])
+
+    # Generation Operations
+    def get_generation(self) -> int:
+        """Get the current generation, re-read from Redis if the listener is not
+        running or the one in memory is older than REDIS_GENERATION_MAX_AGE_SECONDS."""
+        now = time.monotonic()
+        if (
+            self.generation is None
+            or self.listener is None
+            or not self.listener.is_alive()
+            or now - self.generation_read_at > REDIS_GENERATION_MAX_AGE_SECONDS
+        ):
+            self.generation = int(self.client.get(REDIS_GENERATION_KEY) or 0)
+            self.generation_read_at = now
+        return self.generation
+
+    def bump_generation(self) -> int:
+        """Invalidate every lookup and list key in O(1) by moving to a new
+        generation. Lists of the old generation are never read again, so the local
+        tier is left to age them out and keeps its places."""
+        self.generation = self.client.incr(REDIS_GENERATION_KEY)
+        self.generation_read_at = time.monotonic()
+        message = json.dumps(
+            {
+                "source": self.instance_id,
+                "key": None,
+                "keys": [],
+                "generation": self.generation,
+            }
+        )
+        self.client.publish(REDIS_INVALIDATION_CHANNEL, message)
+        return self.generation
+
+    def evict_places(self, ids: List[str]) -> int:
+        """Remove places by id and move to a new generation, so no lookup or list
+        containing them is served, in a single pipelined round trip."""
+        keys = [build_entity_key(id) for id in ids]
+        pipe = self.client.pipeline(transaction=False)
+        if keys:
+            pipe.delete(*keys)
+        pipe.incr(REDIS_GENERATION_KEY)
+
+        # The new generation is not known until the INCR runs, so other processes
+        # are told to re-read it
+        message = json.dumps(
+            {"source": self.instance_id, "key": None, "keys": keys, "generation": None}
+        )
+        pipe.publish(REDIS_INVALIDATION_CHANNEL, message)
+        self.generation = pipe.execute()[-2]
+        self.generation_read_at = time.monotonic()
+        for key in keys:
+            self.local.delete(key)
+        return self.generation
+
+    def versioned(self, key: str, generation: int = None) -> str:
+        """Bake a generation, the current one if None, into a key."""
+        if generation is None:
+            generation = self.get_generation()
+        return f"{key}:g{generation}"
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get hit / miss counters per tier and the local tier size."""
+        return {
+            "local": {**self.counters["local"], "size": len(self.local)},
+            "redis": dict(self.counters["redis"]),
+        }
 
     # Basic String Operations
     def get(self, key: str) -> Union[str, None]:
-        """Get value from cache."""
-        if not self.client.exists(key):
-            return None
+        """Get value from cache, None if it does not exist."""
         return self.client.get(key)
 
-    def set(self, key: str, value) -> bool:
-        """Set key to value in cache."""
-        return self.client.set(key, value, ex=REDIS_TTL_SECONDS)
+    def set(self, key: str, value, ttl: int = REDIS_TTL_SECONDS) -> bool:
+        """Set key to value in cache, expiring after ttl seconds."""
+        return self.client.set(key, value, ex=ttl)
 
-    # Set Place Operations
-    def get_place(self, key: str) -> Union[Place, None]:
-        """Get full dictionary from hash."""
-        # If key does not exist, return None
-        if not self.client.exists(key):
-            return None
-
-        # Get all fields and values from hash, convert to values
-        encoded = self.client.get(key)
-        decoded = json.loads(encoded)
-        return Place(**decoded)
-
-    def set_place(self, key: str, place: Place):
-        """Set field to value in hash."""
+    # Encoding Operations
+    @staticmethod
+    def _encode(place: Place) -> str:
+        """Convert a place to a json string."""
         # Remove the _id field if it exists, product of using MongoDB
         place_dict = place.dict()
         place_dict.pop("_id", None)
+        return json.dumps(place_dict)
+
+    # Place Entity Operations
+    def get_many_places(self, ids: List[str]) -> List[Union[Place, None]]:
+        """Get many places by id with a single MGET for the local misses.
+
+        Places read from Redis are only kept in the local tier if there are at most
+        LOCAL_CACHE_MAX_LIST_SIZE of them.
+
+        Returns a list aligned with ids, None where the place is not cached.
+        """
+        keys = [build_entity_key(id) for id in ids]
+        places = [self._get_local(key) for key in keys]
+        places = [place and place.model_copy(deep=True) for place in places]
 
-        # Convert all values to strings
-        place_dict_str = json.dumps(place_dict)
-        return self.client.set(key, place_dict_str)
+        # Fetch everything the local tier missed in one round trip
+        missing = [i for i, place in enumerate(places) if place is None]
+        keep_local = len(ids) <= LOCAL_CACHE_MAX_LIST_SIZE
+        if missing:
+            encoded = self.client.mget([keys[i] for i in missing])
+            for i, value in zip(missing, encoded):
+                self._record("redis", value is not None)
+                if value is None:
+                    continue
+                places[i] = Place.model_validate_json(value, context=TRUSTED)
+                if keep_local:
+                    self.local.set(keys[i], places[i].model_copy(deep=True))
+        return places
+
+    def set_many_places(
+        self, places: List[Place], ttl: int = REDIS_TTL_SECONDS, pipe=None
+    ) -> None:
+        """Set (or refresh) many places by id in a single pipelined round trip.
+
+        If a pipeline is given the writes are queued on it rather than sent.
+        """
+        keys = [build_entity_key(place.id) for place in places]
+        execute = pipe is None
+        pipe = self.client.pipeline(transaction=False) if execute else pipe
+        for key, place in zip(keys, places):
+            pipe.set(key, self._encode(place), ex=ttl)
+        if execute:
+            pipe.execute()
+        if len(places) <= LOCAL_CACHE_MAX_LIST_SIZE:
+            for key, place in zip(keys, places):
+                self.local.set(key, place.model_copy(deep=True))
+
+    # Get / Set Place Lookup Operations
+    def get_place(self, key: str, generation: int = None) -> Union[Place, None]:
+        """Get the place a lookup key resolves to."""
+        places = self.get_places(key, generation=generation)
+        return places[0] if places else None
+
+    def set_place(
+        self,
+        key: str,
+        place: Place,
+        ttl: int = REDIS_TTL_SECONDS,
+        generation: int = None,
+    ):
+        """Set the place a lookup key resolves to, expiring after ttl seconds."""
+        return self.set_places(key, [place], ttl=ttl, generation=generation)
 
     # Get / Set Place(s) Operations
-    def get_places(self, key: str) -> Union[List[Place], None]:
-        """Get full dictionary from hash."""
-        # If key does not exist, return None
-        if not self.client.exists(key):
-            return None
+    def get_list(
+        self, key: str, generation: int = None
+    ) -> Union[Tuple[List[str], List[Union[Place, None]]], None]:
+        """Get a list of places, a GET for the ids and an MGET for the places.
 
-        # Get all fields and values from hash, convert to values
-        encoded = self.client.get(key)
-        decoded = json.loads(encoded)
-        return [Place(**place) for place in decoded]
+        Returns None if the list is not cached, otherwise its ids and the places
+        aligned with them, None where a place has been evicted so the caller can
+        fetch just those.
+        """
+        generation = self.get_generation() if generation is None else generation
+        key = self.versioned(key, generation)
 
-    def set_places(self, key: str, places: List[Place]):
-        """Set field to value in hash."""
-        # Remove the _id field if it exists, product of using MongoDB
-        places_dict = [place.dict() for place in places]
-        for place in places_dict:
-            place.pop("_id", None)
+        # Check the local tier first for the ids
+        ids = self._get_local(key)
+        if ids is None:
+            encoded = self.client.get(key)
+            self._record("redis", encoded is not None)
+            if encoded is None:
+                return None
+            ids = json.loads(encoded)
+            self.local.set(key, ids)
+        return ids, self.get_many_places(ids)
+
+    def get_places(self, key: str, generation: int = None) -> Union[List[Place], None]:
+        """Get a list of places, None if the list or any of its places is not cached."""
+        cached = self.get_list(key, generation=generation)
+        if cached is None or any(place is None for place in cached[1]):
+            return None
+        return cached[1]
 
-        # Convert all values to strings
-        places_dict_str = json.dumps(places_dict)
-        return self.client.set(key, places_dict_str)
+    def set_places(
+        self,
+        key: str,
+        places: List[Place],
+        ttl: int = REDIS_TTL_SECONDS,
+        generation: int = None,
+    ):
+        """Set a list of places as ids, expiring after ttl seconds. The places
+        themselves are written under their unversioned keys with REDIS_TTL_SECONDS.
+
+        Args:
+            generation (int, optional): Generation read before the places were
+                fetched from the DB. Defaults to the current generation.
+        """
+        generation = self.get_generation() if generation is None else generation
+        key = self.versioned(key, generation)
+        ids = [place.id for place in places]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(key, json.dumps(ids), ex=ttl)
+        self.set_many_places(places, pipe=pipe)
+        result = pipe.execute()[0]
+        self.local.set(key, ids)
+        return result
 
     # Basic Delete and Keys Operations
-    def delete(self, key: str):
-        """Remove key from cache."""
-        if not self.client.exists(key):
-            return None
-        return self.client.delete(key)
+    def delete(self, key: str) -> int:
+        """Remove key from cache, returns the number of keys removed."""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(key)
+        self._invalidate(key, pipe=pipe)
+        return pipe.execute()[0]
 
-    def keys(self, pattern: str = "*"):
+    def keys(self, pattern: str = "*") -> List[str]:
         """Get all keys matching pattern."""
-        all_keys = self.client.keys(pattern)
-        return [key.decode("utf-8") for key in all_keys]
+        return list(self.client.scan_iter(match=pattern))
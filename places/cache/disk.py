@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Union
+
+
+class DiskCache:
+    """String cache persisted to a SQLite file with a per entry TTL, for processes
+    that run without Redis such as the CLI. Safe to share across threads."""
+
+    def __init__(self, path: str):
+        """Initialize the disk cache.
+
+        Args:
+            path (str): SQLite file to store entries in, created if missing
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Union[str, None]:
+        """Get value from the disk cache, None if missing or expired."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            # Drop the entry if it has expired
+            value, expires_at = row
+            if expires_at < time.time():
+                with self.connection:
+                    self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> bool:
+        """Set key to value, expiring after ttl seconds."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl),
+            )
+        return True
+
+    def delete(self, key: str) -> int:
+        """Remove key from the disk cache, returns the number of keys removed."""
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM entries WHERE key = ?", (key,)
+            )
+        return cursor.rowcount
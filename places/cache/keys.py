@@ -0,0 +1,42 @@
+import hashlib
+import json
+from typing import Any
+
+# Bump whenever the shape of cached values changes so old entries are never read
+CACHE_NAMESPACE: str = "places"
+CACHE_SCHEMA_VERSION: int = 1
+
+
+def normalise(value: Any) -> Any:
+    """Normalise a parameter so equivalent requests produce the same key.
+
+    Strings are left as they are, callers normalise them (if at all) before both
+    keying and querying so a key never covers two different queries.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return value
+
+
+def build_key(route: str, **params: Any) -> str:
+    """Build a cache key for a route and its parameters.
+
+    Unset (None) parameters are dropped and the rest are serialised in sorted order
+    and digested with sha256, so the key is the same in every process and across
+    restarts, unlike the salted builtin hash().
+
+    Args:
+        route (str): Name of the cached route, e.g. "search"
+        params: Parameters that affect the result of the route
+    """
+    normalised = {k: normalise(v) for k, v in sorted(params.items()) if v is not None}
+    encoded = json.dumps(normalised, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+    return f"{CACHE_NAMESPACE}:v{CACHE_SCHEMA_VERSION}:{route}:{digest}"
+
+
+def build_entity_key(place_id: str) -> str:
+    """Build the cache key holding a single place, keyed by its id."""
+    return f"{CACHE_NAMESPACE}:v{CACHE_SCHEMA_VERSION}:place:{place_id}"
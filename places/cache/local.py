@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Union
+
+
+class LocalCache:
+    """In-process LRU cache with a per entry TTL, safe to share across threads."""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        """Initialize the local cache.
+
+        Args:
+            max_size (int): Maximum number of entries before evicting the least recently used
+            ttl_seconds (int): Seconds an entry is served for before it expires
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Union[Any, None]:
+        """Get value from the local cache, None if missing or expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            # Drop the entry if it has expired
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+
+            # Mark as most recently used
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Set key to value, evicting the least recently used entries if full."""
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Remove key from the local cache."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all keys from the local cache."""
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import Dict, Union
+
+import googlemaps
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from constants import (
+    GOOGLE_API_KEY,
+    GOOGLE_BASE_URL,
+    GOOGLE_CONNECT_TIMEOUT_SECONDS,
+    GOOGLE_CONNECTION_RETRIES,
+    GOOGLE_MAX_WORKERS,
+    GOOGLE_READ_TIMEOUT_SECONDS,
+    GOOGLE_RETRY_TIMEOUT_SECONDS,
+)
+
+google_client = None
+google_client_lock = threading.Lock()
+
+
+class LookupStats:
+    """Thread-safe latency counters for Google lookups."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero all counters."""
+        with self.lock:
+            self.count = 0
+            self.errors = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        """Record the latency of one lookup."""
+        with self.lock:
+            self.count += 1
+            self.errors += 0 if ok else 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Union[int, float]]:
+        """Get the counters and the mean latency in milliseconds."""
+        with self.lock:
+            mean = self.total_seconds / self.count if self.count else 0.0
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "mean_ms": round(mean * 1000, 2),
+                "max_ms": round(self.max_seconds * 1000, 2),
+            }
+
+
+lookup_stats = LookupStats()
+
+
+def build_session(pool_size: int = GOOGLE_MAX_WORKERS) -> requests.Session:
+    """Build a keep-alive session with a connection pool sized for the enrichment
+    workers, retrying failed connections with exponential backoff.
+
+    Retries on 5xx and over quota responses are left to googlemaps, which backs off
+    until GOOGLE_RETRY_TIMEOUT_SECONDS.
+    """
+    retry = Retry(
+        total=GOOGLE_CONNECTION_RETRIES,
+        connect=GOOGLE_CONNECTION_RETRIES,
+        read=GOOGLE_CONNECTION_RETRIES,
+        status=0,
+        backoff_factor=0.5,
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def build_google_client(
+    key: str = GOOGLE_API_KEY, base_url: str = GOOGLE_BASE_URL
+) -> googlemaps.Client:
+    """Build a Google Maps client on a pooled session.
+
+    Args:
+        key (str, optional): API key. Defaults to GOOGLE_API_KEY.
+        base_url (str, optional): API host, point at a local stub server in tests.
+            Defaults to GOOGLE_BASE_URL.
+    """
+    return googlemaps.Client(
+        key=key,
+        connect_timeout=GOOGLE_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=GOOGLE_READ_TIMEOUT_SECONDS,
+        retry_timeout=GOOGLE_RETRY_TIMEOUT_SECONDS,
+        requests_session=build_session(),
+        base_url=base_url,
+    )
+
+
+def get_google_client() -> googlemaps.Client:
+    """Get the global Google Maps client, created on first use."""
+    global google_client
+    if google_client is None:
+        with google_client_lock:
+            if google_client is None:
+                google_client = build_google_client()
+    return google_client
+
+
+def set_google_client(client: googlemaps.Client) -> None:
+    """Replace the global Google Maps client, e.g. with one for a stub server."""
+    global google_client
+    with google_client_lock:
+        google_client = client
+
+
+def timed_places(query: str, client: googlemaps.Client = None) -> Dict:
+    """Run a Places text search, recording its latency in lookup_stats."""
+    client = client or get_google_client()
+    start = time.perf_counter()
+    try:
+        result = client.places(query=query)
+    except Exception:
+        lookup_stats.record(time.perf_counter() - start, ok=False)
+        raise
+    lookup_stats.record(time.perf_counter() - start)
+    return result
@@ -1,75 +1,84 @@
-import json
-import os
-from typing import List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
 import uuid
 
 import googlemaps
 from tqdm import tqdm
 
-from places.service.places.models import Place
+from constants import GOOGLE_MAX_WORKERS
+from places.google.client import timed_places
+from places.google.lookup_cache import get_lookup_cache
+from places.service.places.models import EnrichmentResult, Place
 
-GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
-INITIAL_RESTAURANTS = "/Users/nicholas/Code/sandbox_mongo_db/data/initial_places.json"
 
-
-def seed(
-    input_file: str = INITIAL_RESTAURANTS, existing: List[str] = None, limit: int = None
-):
+def enrich(name: str, location: str = None) -> EnrichmentResult:
     """
-    Seed the database with initial data.
-
-    Args:
-        input_file (str, optional): Path to the seed data. Defaults to INITIAL_RESTAURANTS.
-        existing (List[str], optional): List of existing restaurant names. Defaults to None.
-        limit (int, optional): Limit the number of records to seed. Defaults to None.
+    Look up a single place, capturing any failure in the result
     """
-    # check if exists
-    if not os.path.exists(INITIAL_RESTAURANTS):
-        print("Seed data not found")
-        return
+    try:
+        place = get_restaurant_info(name=name, location=location)
+    except Exception as e:
+        return EnrichmentResult(name=name, location=location, error=str(e))
+    if place is None:
+        return EnrichmentResult(name=name, location=location, error="No results found")
+    return EnrichmentResult(name=name, location=location, place=place)
 
-    # load initial data
-    with open(input_file, "r") as f:
-        data = json.load(f)
 
-    # limit data based on limit or existing names
-    if limit:
-        data = data[:limit]
-    if existing:
-        data = [d for d in data if d.get("name") not in existing]
+def enrich_many(
+    places: List[Dict[str, str]],
+    max_workers: int = GOOGLE_MAX_WORKERS,
+    progress: bool = False,
+) -> List[EnrichmentResult]:
+    """
+    Look up many places from the Google Places API, at most max_workers at a time.
 
-    # loop and get restaurant info
-    for restaurant in tqdm(data, desc="Seeding data"):
-        try:
-            restaurant_info = get_restaurant_info(
-                name=restaurant.get("name"), location=restaurant.get("location")
-            )
-            restaurant["info"] = restaurant_info
-        except Exception as e:
-            print(f"Error getting restaurant info for {restaurant.get('name')}: {e}")
-            continue
+    Args:
+        places (List[Dict[str, str]]): Places to look up, each with a name and
+            optionally a location
+        max_workers (int, optional): Concurrent lookups. Defaults to GOOGLE_MAX_WORKERS.
+        progress (bool, optional): Show a progress bar. Defaults to False.
 
-    # return data to be inserted
-    return [d for d in data if d.get("info") is not None]
+    Returns:
+        List[EnrichmentResult]: One result per place, in the same order
+    """
+    if not places:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = pool.map(
+            lambda p: enrich(name=p.get("name"), location=p.get("location")), places
+        )
+        if progress:
+            results = tqdm(results, total=len(places), desc="Enriching places")
+        return list(results)
 
 
-def get_restaurant_info(name: str, location: str = None) -> Union[Place, None]:
+def get_restaurant_info(
+    name: str,
+    location: str = None,
+    client: googlemaps.Client = None,
+    use_cache: bool = True,
+) -> Union[Place, None]:
     """
-    Get restaurant info from Google Places API
+    Get restaurant info from Google Places API, using the shared pooled client
+    unless one is given. Results, including no results, are served from the
+    lookup cache when use_cache is set
     """
-    # build query and get supplemental info
+    # build query and check the lookup cache
     query = name if location is None else f"{name} near {location}"
-    gmaps = googlemaps.Client(key=GOOGLE_API_KEY)
-    places_result = gmaps.places(query=query)
+    cached, first = get_lookup_cache().get(query) if use_cache else (False, None)
+
+    # otherwise get supplemental info, keeping only the first result
+    if not cached:
+        places_result = timed_places(query=query, client=client)
+        first = places_result["results"][0] if places_result["results"] else None
+        if use_cache:
+            get_lookup_cache().set(query, first)
 
     # check if results, return None otherwise
-    if not places_result["results"]:
+    if first is None:
         print(f"No results found for {name}")
         return None
 
-    # return first result
-    first = places_result["results"][0]
-
     # update with new id and return
-    first["id"] = str(uuid.uuid4())
-    return Place(**first)
+    return Place(**{**first, "id": str(uuid.uuid4())})
@@ -0,0 +1,107 @@
+import json
+import logging
+import threading
+from typing import Dict, Tuple, Union
+
+import redis
+
+from constants import (
+    GOOGLE_LOOKUP_CACHE_PATH,
+    GOOGLE_LOOKUP_TTL_SECONDS,
+    GOOGLE_MISS_TTL_SECONDS,
+)
+from places.cache.cache import Cache, get_places_cache
+from places.cache.disk import DiskCache
+from places.cache.keys import build_key
+
+lookup_cache = None
+lookup_cache_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+# Encoded value of a cached "No results found"
+MISS = "null"
+
+
+def get_lookup_cache():
+    """Get the global Google lookup cache, created on first use."""
+    global lookup_cache
+    if lookup_cache is None:
+        with lookup_cache_lock:
+            if lookup_cache is None:
+                lookup_cache = LookupCache()
+    return lookup_cache
+
+
+def build_lookup_key(query: str) -> str:
+    """Build the cache key for a Google Places text query, case and whitespace
+    insensitive."""
+    return build_key("google", query=" ".join(query.lower().split()))
+
+
+class LookupCache:
+    """Cache of raw Google Places results by query, so repeat enrichments cost no
+    API calls or quota.
+
+    Stored in Redis through the shared Cache when it is reachable, otherwise in a
+    SQLite file at GOOGLE_LOOKUP_CACHE_PATH. Misses are cached too, but only for
+    GOOGLE_MISS_TTL_SECONDS so a place Google later learns about is picked up.
+    """
+
+    def __init__(self):
+        """Initialize the lookup cache."""
+        self.store = self._connect()
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "negative_hits": 0, "misses": 0}
+
+    @staticmethod
+    def _connect() -> Union[Cache, DiskCache]:
+        """Use Redis if it answers, falling back to the disk cache."""
+        try:
+            cache = get_places_cache()
+            cache.client.ping()
+            return cache
+        except redis.RedisError as e:
+            logger.warning(
+                f"Redis unavailable ({e}), caching Google lookups in "
+                f"{GOOGLE_LOOKUP_CACHE_PATH}"
+            )
+            return DiskCache(GOOGLE_LOOKUP_CACHE_PATH)
+
+    def _record(self, counter: str) -> None:
+        """Count a hit, negative hit or miss."""
+        with self.lock:
+            self.counters[counter] += 1
+
+    def get(self, query: str) -> Tuple[bool, Union[Dict, None]]:
+        """Get the cached result for a query.
+
+        Returns:
+            Tuple[bool, Union[Dict, None]]: Whether the query was cached, and its
+                first result or None if Google found nothing
+        """
+        try:
+            encoded = self.store.get(build_lookup_key(query))
+        except redis.RedisError as e:
+            logger.warning(f"Could not read Google lookup for {query}: {e}")
+            encoded = None
+        if encoded is None:
+            self._record("misses")
+            return False, None
+        self._record("negative_hits" if encoded == MISS else "hits")
+        return True, json.loads(encoded)
+
+    def set(self, query: str, result: Union[Dict, None]) -> None:
+        """Cache the first result for a query, or None if Google found nothing."""
+        ttl = GOOGLE_MISS_TTL_SECONDS if result is None else GOOGLE_LOOKUP_TTL_SECONDS
+        try:
+            self.store.set(build_lookup_key(query), json.dumps(result), ttl=ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Could not cache Google lookup for {query}: {e}")
+
+    def stats(self) -> Dict[str, Union[int, str]]:
+        """Get hit / miss counters and the backing store."""
+        with self.lock:
+            counters = dict(self.counters)
+        backend = "disk" if isinstance(self.store, DiskCache) else "redis"
+        return {**counters, "backend": backend}
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterator, List
+
+from pydantic import BaseModel
+from tqdm import tqdm
+
+from constants import GOOGLE_MAX_WORKERS, SEED_CHECKPOINT_DIR, SEED_CHUNK_SIZE
+from places.google.google import enrich_many
+from places.service.places.models import Place
+
+INITIAL_RESTAURANTS = "/Users/nicholas/Code/sandbox_mongo_db/data/initial_places.json"
+
+
+class SeedReport(BaseModel):
+    """Outcome of a seed run"""
+
+    processed: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    failed: int = 0
+    resumed_from: int = 0
+    seconds: float = 0.0
+    complete: bool = False
+
+    @property
+    def places_per_second(self) -> float:
+        return self.processed / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"Processed {self.processed} places in {self.seconds:.1f}s "
+            f"({self.places_per_second:.1f} places/sec): {self.inserted} inserted, "
+            f"{self.skipped} skipped, {self.failed} failed"
+        )
+
+
+def iter_seed_records(input_file: str, block_size: int = 64 * 1024) -> Iterator[Dict]:
+    """
+    Iterate over the records of a JSON array file, reading block_size characters at
+    a time rather than loading the whole file.
+
+    Raises:
+        ValueError: If the file is not a JSON array
+    """
+    decoder = json.JSONDecoder()
+    with open(input_file, "r") as f:
+        buffer, eof, started = "", False, False
+        while True:
+            buffer = buffer.lstrip()
+
+            # find the opening bracket, then skip separators between records
+            if not started and buffer:
+                if buffer[0] != "[":
+                    raise ValueError(f"{input_file} is not a JSON array")
+                buffer, started = buffer[1:].lstrip(), True
+            if started and buffer.startswith(","):
+                buffer = buffer[1:].lstrip()
+            if started and buffer.startswith("]"):
+                return
+
+            # decode the next record, reading more if it is incomplete
+            try:
+                if not started:
+                    raise json.JSONDecodeError("Expecting '['", buffer, 0)
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                block = f.read(block_size)
+                eof = not block
+                buffer += block
+                continue
+            yield record
+            buffer = buffer[end:]
+
+
+class SeedCheckpoint:
+    """
+    Number of records of a seed file already written to the database, saved after
+    every chunk so an interrupted seed resumes where it stopped. The checkpoint is
+    ignored if the seed file has changed since it was written.
+    """
+
+    def __init__(self, input_file: str, directory: str = SEED_CHECKPOINT_DIR):
+        input_file = os.path.abspath(input_file)
+        digest = hashlib.sha256(input_file.encode("utf-8")).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(input_file))[0]
+        self.input_file = input_file
+        self.path = os.path.join(directory, f"{name}-{digest}.json")
+
+    def _fingerprint(self) -> Dict:
+        stat = os.stat(self.input_file)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load(self) -> int:
+        """Get the offset to resume from, 0 if there is no usable checkpoint"""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "r") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("file") != self._fingerprint():
+            print(f"Seed data changed since {self.path} was written, starting over")
+            return 0
+        return checkpoint["offset"]
+
+    def save(self, offset: int) -> None:
+        """Record that the first offset records have been written"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        checkpoint = {
+            "input_file": self.input_file,
+            "file": self._fingerprint(),
+            "offset": offset,
+        }
+
+        # write then rename so a crash never leaves a partial checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the seed has finished"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def seed(
+    insert: Callable[[List[Place]], int],
+    input_file: str = INITIAL_RESTAURANTS,
+    existing: List[str] = None,
+    limit: int = None,
+    max_workers: int = GOOGLE_MAX_WORKERS,
+    chunk_size: int = SEED_CHUNK_SIZE,
+    restart: bool = False,
+) -> SeedReport:
+    """
+    Seed the database from a JSON array of {"name", "location"} records, enriching
+    and inserting chunk_size records at a time and checkpointing after each chunk.
+
+    Args:
+        insert (Callable[[List[Place]], int]): Writes a chunk of places, returning
+            how many distinct place_ids are stored, e.g. PlacesManager.insert_many
+        input_file (str, optional): Path to the seed data. Defaults to INITIAL_RESTAURANTS.
+        existing (List[str], optional): List of existing restaurant names. Defaults to None.
+        limit (int, optional): Limit the number of records to seed. Defaults to None.
+        max_workers (int, optional): Concurrent lookups. Defaults to GOOGLE_MAX_WORKERS.
+        chunk_size (int, optional): Records per chunk. Defaults to SEED_CHUNK_SIZE.
+        restart (bool, optional): Ignore any checkpoint and start from the first
+            record. Defaults to False.
+    """
+    existing = set(existing or [])
+    checkpoint = SeedCheckpoint(input_file)
+    offset = 0 if restart else checkpoint.load()
+    report = SeedReport(resumed_from=offset)
+    if offset:
+        print(f"Resuming from record {offset} of {input_file}")
+
+    # skip what has already been written, and anything past the limit
+    records = islice(iter_seed_records(input_file), offset, limit)
+    progress = tqdm(desc="Seeding places", unit="place", initial=offset, total=limit)
+    start = time.perf_counter()
+    try:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            # enrich the records that are valid and not already inserted
+            valid = [r for r in chunk if isinstance(r, dict) and r.get("name")]
+            todo = [r for r in valid if r["name"] not in existing]
+            report.failed += len(chunk) - len(valid)
+            report.skipped += len(valid) - len(todo)
+            places, names = [], []
+            for result in enrich_many(todo, max_workers=max_workers):
+                if result.error:
+                    print(
+                        f"Error getting restaurant info for {result.name}: {result.error}"
+                    )
+                    report.failed += 1
+                    continue
+                places.append(result.place)
+                names.append(result.name)
+
+            # write the chunk, stopping without a checkpoint if it fails
+            if places and insert(places) != len({p.place_id for p in places}):
+                print(f"Failed to insert places after record {offset}, rerun to resume")
+                return report
+            report.inserted += len(places)
+            existing.update(names)
+            offset += len(chunk)
+            checkpoint.save(offset)
+            report.processed += len(chunk)
+            progress.update(len(chunk))
+
+        report.complete = True
+        checkpoint.clear()
+        return report
+    finally:
+        progress.close()
+        report.seconds = time.perf_counter() - start
@@ -1,25 +1,55 @@
+import os
+import threading
 import uuid
-from typing import List
+from typing import Dict, List, Optional
 
+import pymongo
+import pymongo.errors
+
+from constants import COMMENTS_INSERT_BATCH_SIZE
 from places.service.comments.models import CommentModel, CommentsModel
 from places.service.mongo_utils import get_client, get_collection
+from places.service.page_utils import decode_after, encode_after
+
+# Comments are listed oldest first, comment_id breaks ties between pages
+COMMENTS_SORT = [("created_at", pymongo.ASCENDING), ("comment_id", pymongo.ASCENDING)]
 
 # Singleton manager class
 _MANAGER_SINGLETON = None
+_MANAGER_LOCK = threading.Lock()
 
 
 def get_manager():
     global _MANAGER_SINGLETON
     if _MANAGER_SINGLETON is None:
-        _MANAGER_SINGLETON = CommentsManager()
+        with _MANAGER_LOCK:
+            if _MANAGER_SINGLETON is None:
+                _MANAGER_SINGLETON = CommentsManager()
     return _MANAGER_SINGLETON
 
 
+def _reset_after_fork() -> None:
+    """Forget the manager in a forked child, so it creates its own client"""
+    global _MANAGER_SINGLETON, _MANAGER_LOCK
+    _MANAGER_SINGLETON = None
+    _MANAGER_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 class CommentsManager:
     def __init__(self):
         self.client = get_client()
         self.collection_name = "comments"
         self.collection = get_collection(self.client, self.collection_name)
+        self.ensure_indexes()
+
+    def ensure_indexes(self) -> None:
+        """Create the indexes backing get, counts and lookups by comment_id, a no-op
+        if they already exist"""
+        self.collection.create_index([("place_id", pymongo.ASCENDING), *COMMENTS_SORT])
+        self.collection.create_index("comment_id")
 
     ########################################################
     # Drop                                                 #
@@ -39,14 +69,57 @@ class CommentsManager:
     # Get                                                  #
     ########################################################
 
-    def get(self, place_id: str) -> CommentsModel:
-        """Get all comments for a place.
+    def get(self, place_id: str, limit: int = None, after: str = None) -> CommentsModel:
+        """Get comments for a place oldest first, a page at a time if limit is set.
         Args:
             place_id (str): Place to get comments for
+            limit (int, optional): Page size, all comments if None. Defaults to None.
+            after (str, optional): Token from the previous page. Defaults to None.
+        Raises:
+            ValueError: If after is not a valid token
         """
         print(f"Getting comments for {place_id}")
-        comments = self.collection.find({"place_id": place_id})
-        return CommentsModel(comments=[CommentModel(**comment) for comment in comments])
+        query = {"place_id": place_id}
+        if after is not None:
+            values = decode_after(after)
+            if len(values) != len(COMMENTS_SORT):
+                raise ValueError(f"Invalid after token '{after}'")
+            created_at, comment_id = values
+            query["$or"] = [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "comment_id": {"$gt": comment_id}},
+            ]
+
+        cursor = self.collection.find(query, {"_id": 0}).sort(COMMENTS_SORT)
+        if limit:
+            cursor = cursor.limit(limit)
+        comments = [CommentModel(**comment) for comment in cursor]
+
+        # Only a full page can have another after it
+        next_after = None
+        if limit and len(comments) == limit:
+            next_after = encode_after(
+                [comments[-1].created_at, comments[-1].comment_id]
+            )
+        return CommentsModel(comments=comments, after=next_after)
+
+    def counts(self, place_ids: List[str]) -> Dict[str, int]:
+        """Count the comments on many places in a single aggregation.
+        Args:
+            place_ids (List[str]): Places to count comments for
+        Returns:
+            Dict[str, int]: Comment count by place_id, 0 for places without any
+        """
+        print(f"Counting comments for {len(place_ids)} places")
+        counts = dict.fromkeys(place_ids, 0)
+        results = self.collection.aggregate(
+            [
+                {"$match": {"place_id": {"$in": list(counts)}}},
+                {"$group": {"_id": "$place_id", "count": {"$sum": 1}}},
+            ]
+        )
+        counts.update({result["_id"]: result["count"] for result in results})
+        return counts
 
     ########################################################
     # Insert                                               #
@@ -66,12 +139,58 @@ class CommentsManager:
         except Exception as e:
             print(f"Error inserting {comment.text}: {e}")
 
-    def add_many(self, comments: List[CommentModel]) -> None:
-        """Insert multiple comments into the database.
+    def add_many(
+        self,
+        comments: List[CommentModel],
+        batch_size: int = COMMENTS_INSERT_BATCH_SIZE,
+    ) -> List[Optional[str]]:
+        """Insert multiple comments into the database, batch_size per unordered
+        insert_many so one bad comment does not stop the rest.
         Args:
             comments (List[CommentModel]): List of comments
+            batch_size (int, optional): Comments per insert_many. Defaults to
+                COMMENTS_INSERT_BATCH_SIZE.
+        Returns:
+            List[Optional[str]]: The error for each comment, None if it was inserted.
+                If a batch fails part way (e.g. the connection drops) its comments
+                are re-checked, those that cannot be are reported as unknown
         """
         print(f"Inserting {len(comments)} comments into {self.collection_name}")
-        for comment in comments:
-            self.insert(comment)
-        print(f"Inserted {len(comments)} comments into {self.collection_name}")
+        errors = [None] * len(comments)
+        for start in range(0, len(comments), batch_size):
+            batch = comments[start : start + batch_size]
+            docs = [{**comment.dict(), "id": str(uuid.uuid4())} for comment in batch]
+            try:
+                self.collection.insert_many(docs, ordered=False)
+            except pymongo.errors.BulkWriteError as e:
+                for error in e.details["writeErrors"]:
+                    errors[start + error["index"]] = error["errmsg"]
+            except pymongo.errors.PyMongoError as e:
+                # Some of the batch may have been written before the error
+                errors[start : start + len(batch)] = self.check_inserted(batch, e)
+        inserted = errors.count(None)
+        print(f"Inserted {inserted} comments into {self.collection_name}")
+        return errors
+
+    def check_inserted(
+        self, comments: List[CommentModel], error: Exception
+    ) -> List[Optional[str]]:
+        """Find which comments of a failed insert_many were stored anyway.
+        Args:
+            comments (List[CommentModel]): Comments of the failed batch
+            error (Exception): Error the insert_many raised
+        Returns:
+            List[Optional[str]]: None for each stored comment, the error for the rest
+        """
+        comment_ids = [comment.comment_id for comment in comments]
+        try:
+            stored = {
+                doc["comment_id"]
+                for doc in self.collection.find(
+                    {"comment_id": {"$in": comment_ids}}, {"_id": 0, "comment_id": 1}
+                )
+            }
+        except pymongo.errors.PyMongoError as e:
+            unknown = f"Unknown if inserted, {error}, and the check failed: {e}"
+            return [unknown] * len(comments)
+        return [None if id in stored else str(error) for id in comment_ids]
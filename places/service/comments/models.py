@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -18,3 +18,17 @@ class CommentModel(BaseModel):
 
 class CommentsModel(BaseModel):
     comments: List[CommentModel]
+    # Token for the next page, None if this was the last
+    after: Optional[str] = None
+
+
+class CommentAddResult(BaseModel):
+    """Outcome of adding one comment, error is set on failure"""
+
+    place_id: str
+    comment: Optional[CommentModel] = None
+    error: Optional[str] = None
+
+
+class CommentCountsModel(BaseModel):
+    counts: Dict[str, int]
@@ -2,40 +2,116 @@
 import datetime
 import logging
 import uuid
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
-from places.service.comments.manager import get_manager as get_comments_manager
+from constants import (
+    COMMENTS_MAX_COUNT_PLACES,
+    COMMENTS_MAX_PAGE_SIZE,
+    PLACES_NEXT_PAGE_HEADER,
+)
+
+from places.service.comments.manager import CommentsManager
 from places.service.comments.models import (
+    CommentAddResult,
+    CommentCountsModel,
     CommentInsertModel,
     CommentModel,
     CommentsModel,
 )
-from places.service.places.manager import get_manager as get_places_manager
+from places.service.dependencies import get_comments_manager, get_places_manager
+from places.service.places.manager import PlacesManager
 
 # Constants
-places_manager = get_places_manager()
-comments_manager = get_comments_manager()
-
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.get("/comments/get")
-def get_comments(place_id: str) -> CommentsModel:
-    """Get all comments for a place.
+def get_comments(
+    place_id: str,
+    response: Response,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    comments_manager: CommentsManager = Depends(get_comments_manager),
+) -> CommentsModel:
+    """Get comments for a place, oldest first.
+
+    The token for the next page is returned in the X-Next-After header, as for
+    places, and in the after field of the body.
 
     Args:
         place_id (str): Place to get comments for
+        response (Response): Response to set the next page header on
+        limit (int, optional): Page size, every comment is returned if neither limit
+            nor after is set. Defaults to None.
+        after (str, optional): Token from the X-Next-After header of the previous
+            page. Defaults to None.
     """
+    if after is not None and limit is None:
+        limit = COMMENTS_MAX_PAGE_SIZE
+    if limit is not None and not 0 < limit <= COMMENTS_MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Please provide a limit between 1 and {COMMENTS_MAX_PAGE_SIZE}",
+        )
+
     print(f"Getting comments for {place_id}")
-    comments = comments_manager.get(place_id=place_id)
-    return comments
+    try:
+        page = comments_manager.get(place_id=place_id, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.after:
+        response.headers[PLACES_NEXT_PAGE_HEADER] = page.after
+    return page
+
+
+@router.get("/comments/counts")
+def get_comment_counts(
+    place_ids: List[str] = Query(...),
+    comments_manager: CommentsManager = Depends(get_comments_manager),
+) -> CommentCountsModel:
+    """Get the number of comments on many places at once.
+
+    Args:
+        place_ids (List[str]): Places to count comments for, repeated
+            (?place_ids=a&place_ids=b) or comma separated (?place_ids=a,b), at most
+            COMMENTS_MAX_COUNT_PLACES
+    """
+    place_ids = list(
+        dict.fromkeys(id for ids in place_ids for id in ids.split(",") if id)
+    )
+    if not place_ids:
+        raise HTTPException(status_code=400, detail="Please provide place_ids")
+    if len(place_ids) > COMMENTS_MAX_COUNT_PLACES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Please provide at most {COMMENTS_MAX_COUNT_PLACES} place_ids",
+        )
+
+    print(f"Counting comments for {len(place_ids)} places")
+    return CommentCountsModel(counts=comments_manager.counts(place_ids=place_ids))
+
+
+def build_comment(place_id: str, text: str) -> CommentModel:
+    """Build a new comment on a place, stamped with the current time."""
+    now = str(datetime.datetime.utcnow())
+    return CommentModel(
+        place_id=place_id,
+        comment_id=str(uuid.uuid4()),
+        text=text,
+        created_at=now,
+        updated_at=now,
+    )
 
 
 @router.post("/comments/add")
-def add_comment(comment: CommentInsertModel) -> CommentModel:
+def add_comment(
+    comment: CommentInsertModel,
+    places_manager: PlacesManager = Depends(get_places_manager),
+    comments_manager: CommentsManager = Depends(get_comments_manager),
+) -> CommentModel:
     """Add a restaurant to the database.
 
     Args:
@@ -58,20 +134,60 @@ def add_comment(comment: CommentInsertModel) -> CommentModel:
         raise HTTPException(status_code=404, detail=detail)
 
     # Add comment to the database
-    new_comment = CommentModel(
-        place_id=place.id,
-        comment_id=str(uuid.uuid4()),
-        text=comment.text,
-        created_at=str(datetime.datetime.utcnow()),
-        updated_at=str(datetime.datetime.utcnow()),
-    )
+    new_comment = build_comment(place_id=place.id, text=comment.text)
 
     new_comment = comments_manager.add(comment=new_comment)
     return new_comment
 
 
+@router.post("/comments/add/many")
+def add_comments(
+    comments: List[CommentInsertModel],
+    places_manager: PlacesManager = Depends(get_places_manager),
+    comments_manager: CommentsManager = Depends(get_comments_manager),
+) -> List[CommentAddResult]:
+    """Add many comments, checking every place they refer to in a single query.
+
+    Args:
+        comments (List[CommentInsertModel]): Comments to add
+
+    Returns:
+        List[CommentAddResult]: One result per comment, with the added comment or
+            the reason it could not be added
+    """
+    print(f"Adding {len(comments)} comments")
+    existing = places_manager.get_existing_ids(
+        {comment.place_id for comment in comments if comment.place_id}
+    )
+
+    # Build the valid comments, reporting the rest
+    results, pending = [], []
+    for comment in comments:
+        result = CommentAddResult(place_id=comment.place_id)
+        results.append(result)
+        if not comment.text or not comment.place_id:
+            result.error = "Please provide a comment and place_id"
+        elif comment.place_id not in existing:
+            result.error = f"Could not find place by id '{comment.place_id}'"
+        else:
+            result.comment = build_comment(place_id=comment.place_id, text=comment.text)
+            pending.append(result)
+
+    # Insert them in bulk, dropping any that failed from their result
+    errors = comments_manager.add_many([result.comment for result in pending])
+    for result, error in zip(pending, errors):
+        if error:
+            result.comment, result.error = None, error
+    for result in results:
+        if result.error:
+            logger.error(f"Could not add comment to {result.place_id}: {result.error}")
+    return results
+
+
 @router.post("/comments/delete")
-def delete_comment(comment_id: str) -> None:
+def delete_comment(
+    comment_id: str, comments_manager: CommentsManager = Depends(get_comments_manager)
+) -> None:
     """Delete a comment by id.
 
     Args:
@@ -0,0 +1,55 @@
+"""FastAPI dependencies for the routes
+
+Managers are created on first use (or by warm_up in the service lifespan) rather
+than when a router is imported, so importing the service never touches the
+network. The singletons are created under a lock, so a warm up still running in
+its thread and the first requests share one instance. A forked worker (e.g.
+gunicorn --preload) forgets the singletons it inherited and creates its own, with
+its own Mongo and Redis clients. Override these in app.dependency_overrides to
+swap a manager out.
+"""
+
+from places.cache.cache import Cache, get_places_cache
+from places.service.comments.manager import CommentsManager
+from places.service.comments.manager import get_manager as get_comments_singleton
+from places.service.places.async_manager import AsyncPlacesManager, get_async_manager
+from places.service.places.manager import PlacesManager
+from places.service.places.manager import get_manager as get_places_singleton
+from places.service.recipes.manager import RecipeManager
+from places.service.recipes.manager import get_manager as get_recipes_singleton
+
+
+def get_places_manager() -> PlacesManager:
+    """Sync places manager, for the write routes"""
+    return get_places_singleton()
+
+
+async def get_async_places_manager() -> AsyncPlacesManager:
+    """Async places manager, for the read routes. Creating it opens no connections
+    so it is resolved on the event loop rather than in the threadpool"""
+    return get_async_manager()
+
+
+def get_cache() -> Cache:
+    """Places cache, for the read routes. Sync as creating it subscribes to Redis,
+    so it is resolved in the threadpool rather than blocking the event loop"""
+    return get_places_cache()
+
+
+def get_comments_manager() -> CommentsManager:
+    """Comments manager"""
+    return get_comments_singleton()
+
+
+def get_recipes_manager() -> RecipeManager:
+    """Recipes manager"""
+    return get_recipes_singleton()
+
+
+def warm_up() -> None:
+    """Create every manager and the cache, connecting to Mongo and Redis"""
+    get_places_singleton()
+    get_async_manager()
+    get_places_cache()
+    get_comments_singleton()
+    get_recipes_singleton()
@@ -1,23 +1,182 @@
+import os
 import sys
+import threading
+from typing import Dict
 
 import pymongo
+from pymongo.monitoring import ConnectionPoolListener
 
-from constants import MONGO_URI
+from constants import (
+    MONGO_COMPRESSORS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_URI,
+)
 
+# Process-wide clients, with the pid that created them and their pool stats
+clients = {}
+clients_lock = threading.Lock()
 
-def get_client():
-    """Gets MongoDB client"""
-    try:
-        client = pymongo.MongoClient(MONGO_URI)
-        client.admin.command("ping")
-    except pymongo.errors.ConfigurationError:
-        print(
-            "An Invalid URI host error was received. Is your Atlas host name correct in your connection string?"
+
+class PoolStats(ConnectionPoolListener):
+    """Connection pool counters for one client, summed over its servers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {
+            "open": 0,
+            "in_use": 0,
+            "max_in_use": 0,
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checkout_wait_ms": 0.0,
+            "pool_clears": 0,
+        }
+
+    def _add(self, **deltas) -> None:
+        with self.lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+            self.counters["max_in_use"] = max(
+                self.counters["max_in_use"], self.counters["in_use"]
+            )
+
+    def snapshot(self) -> Dict[str, float]:
+        """Get the counters, with the mean wait for a connection in milliseconds."""
+        with self.lock:
+            counters = dict(self.counters)
+        wait_ms = counters.pop("checkout_wait_ms")
+        checkouts = counters["checkouts"]
+        counters["mean_checkout_wait_ms"] = round(
+            wait_ms / checkouts if checkouts else 0.0, 3
         )
-        sys.exit(1)
+        return counters
+
+    def connection_created(self, event):
+        self._add(open=1, created=1)
+
+    def connection_closed(self, event):
+        self._add(open=-1, closed=1)
+
+    def connection_checked_out(self, event):
+        wait_ms = (getattr(event, "duration", None) or 0.0) * 1000
+        self._add(in_use=1, checkouts=1, checkout_wait_ms=wait_ms)
+
+    def connection_checked_in(self, event):
+        self._add(in_use=-1)
+
+    def connection_check_out_failed(self, event):
+        self._add(checkout_failures=1)
+
+    def pool_cleared(self, event):
+        self._add(pool_clears=1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+def client_options() -> Dict:
+    """Options shared by the sync and asyncio clients"""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+
+def shared_client(kind: str, create):
+    """Get the process-wide client of a kind, creating it on first use.
+
+    A client is never shared across a fork, a worker forked from a process that
+    already had one (e.g. uvicorn or gunicorn with --workers or --preload)
+    creates its own, with its own pool stats. The managers and the cache hold
+    on to their clients, so each of those modules forgets its singletons in the
+    child (see os.register_at_fork) and they are created again on first use.
+    create is called with the PoolStats listener to register on the new client.
+    """
+    pid = os.getpid()
+    client, owner, _ = clients.get(kind, (None, None, None))
+    if client is None or owner != pid:
+        with clients_lock:
+            client, owner, _ = clients.get(kind, (None, None, None))
+            if client is None or owner != pid:
+                stats = PoolStats()
+                client = create(stats)
+                clients[kind] = (client, pid, stats)
     return client
 
 
+def get_client() -> pymongo.MongoClient:
+    """Gets the process-wide MongoDB client"""
+
+    def create(stats: PoolStats):
+        try:
+            client = pymongo.MongoClient(
+                MONGO_URI, event_listeners=[stats], **client_options()
+            )
+            client.admin.command("ping")
+        except pymongo.errors.ConfigurationError:
+            print(
+                "An Invalid URI host error was received. Is your Atlas host name correct in your connection string?"
+            )
+            sys.exit(1)
+        return client
+
+    return shared_client("sync", create)
+
+
+def get_async_client():
+    """Gets the process-wide asyncio MongoDB client, connections are opened lazily
+    on first use"""
+    # Motor runs every operation on a thread pool sized once, when it is first
+    # imported, at 5 threads per CPU by default. That caps the queries in flight
+    # well below the pool, so size it to the pool unless it was set explicitly.
+    os.environ.setdefault("MOTOR_MAX_WORKERS", str(MONGO_MAX_POOL_SIZE))
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return shared_client(
+        "async",
+        lambda stats: AsyncIOMotorClient(
+            MONGO_URI, event_listeners=[stats], **client_options()
+        ),
+    )
+
+
+def get_pool_stats() -> Dict[str, Dict[str, float]]:
+    """Get connection pool counters for the sync and asyncio clients this process
+    has created"""
+    pid = os.getpid()
+    return {
+        kind: stats.snapshot()
+        for kind, (_, owner, stats) in list(clients.items())
+        if owner == pid
+    }
+
+
 def get_collection(client, collection_name):
     db = client.myDatabase
     return db[collection_name]
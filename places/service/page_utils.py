@@ -0,0 +1,26 @@
+import base64
+import binascii
+import json
+from typing import List
+
+
+def encode_after(values: List) -> str:
+    """Encode the sort values of the last result into an opaque token"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_after(after: str) -> List:
+    """Decode a token from encode_after, raising ValueError if it is malformed.
+
+    Only scalars are accepted, the values end up in a $match so a crafted token
+    must not be able to smuggle in query operators such as {"$regex": ...}.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(after.encode("ascii")))
+    except (UnicodeError, binascii.Error, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid after token '{after}'") from e
+    if not isinstance(values, list) or not all(
+        value is None or isinstance(value, (str, int, float, bool)) for value in values
+    ):
+        raise ValueError(f"Invalid after token '{after}'")
+    return values
@@ -0,0 +1,199 @@
+import os
+import threading
+from typing import AsyncIterator, Dict, List, Union
+
+from constants import MONGO_STREAM_BATCH_SIZE
+from places.service.mongo_utils import get_async_client, get_collection
+from places.service.places.manager import (
+    build_name_query,
+    build_nearby_pipeline,
+    build_next_after,
+    build_page_pipeline,
+    build_search_query,
+    build_search_sort,
+)
+from places.service.places.models import (
+    PLACE_VIEWS,
+    TRUSTED,
+    NearbyPlace,
+    Place,
+    PlacesPage,
+    PlaceSummary,
+    PlaceView,
+)
+
+# Singleton manager class
+_MANAGER_SINGLETON = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_async_manager():
+    global _MANAGER_SINGLETON
+    if _MANAGER_SINGLETON is None:
+        with _MANAGER_LOCK:
+            if _MANAGER_SINGLETON is None:
+                _MANAGER_SINGLETON = AsyncPlacesManager()
+    return _MANAGER_SINGLETON
+
+
+def _reset_after_fork() -> None:
+    """Forget the manager in a forked child, so it creates its own client"""
+    global _MANAGER_SINGLETON, _MANAGER_LOCK
+    _MANAGER_SINGLETON = None
+    _MANAGER_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+###################################################################
+# Async Restaurant Manager                                        #
+###################################################################
+
+
+class AsyncPlacesManager:
+    """Read side of the PlacesManager for the service, queries run on the event
+    loop instead of blocking a threadpool worker per request."""
+
+    def __init__(self):
+        self.client = get_async_client()
+        self.collection_name = "restaurants"
+        self.collection = get_collection(self.client, self.collection_name)
+
+    ########################################################
+    # Search                                               #
+    ########################################################
+
+    async def search(
+        self,
+        name: str = None,
+        address: str = None,
+        min_rating: float = None,
+        exact: bool = False,
+        use_regex: bool = False,
+        view: PlaceView = "full",
+    ) -> List[Union[Place, PlaceSummary]]:
+        """Search for a restaurant by query, sorted by name"""
+        page = await self.search_page(
+            name=name,
+            address=address,
+            min_rating=min_rating,
+            exact=exact,
+            use_regex=use_regex,
+            view=view,
+        )
+        return page.places
+
+    async def search_page(
+        self,
+        name: str = None,
+        address: str = None,
+        min_rating: float = None,
+        exact: bool = False,
+        use_regex: bool = False,
+        limit: int = None,
+        after: str = None,
+        view: PlaceView = "full",
+    ) -> PlacesPage:
+        """Get a page of search results, sorted by name"""
+        query = build_search_query(
+            name=name,
+            address=address,
+            min_rating=min_rating,
+            exact=exact,
+            use_regex=use_regex,
+        )
+        print(f"Searching for {query} in {self.collection_name}")
+        return await self._page(query=query, limit=limit, after=after, view=view)
+
+    async def _page(
+        self,
+        query: Dict,
+        limit: int = None,
+        after: str = None,
+        view: PlaceView = "full",
+    ) -> PlacesPage:
+        """Run a keyset paginated query, sorted and limited by Mongo"""
+        pipeline = build_page_pipeline(query=query, limit=limit, after=after, view=view)
+        docs = [doc async for doc in self.collection.aggregate(pipeline)]
+        return PlacesPage(
+            places=[
+                PLACE_VIEWS[view].model_validate(doc, context=TRUSTED) for doc in docs
+            ],
+            after=build_next_after(docs=docs, limit=limit),
+        )
+
+    ########################################################
+    # Get                                                  #
+    ########################################################
+
+    async def get(
+        self, name: str, exact: bool = False, use_regex: bool = False
+    ) -> Place:
+        """Get the first restaurant, sorted by name, matching a name"""
+        query = build_name_query(name=name, exact=exact, use_regex=use_regex)
+        print(f"Getting {name} from {self.collection_name}")
+        result = await self.collection.find_one(query, sort=build_search_sort())
+        return Place.model_validate(result, context=TRUSTED) if result else None
+
+    async def get_all(
+        self, view: PlaceView = "full"
+    ) -> List[Union[Place, PlaceSummary]]:
+        """Get all restaurants, sorted by name"""
+        page = await self.get_all_page(view=view)
+        return page.places
+
+    async def get_all_page(
+        self, limit: int = None, after: str = None, view: PlaceView = "full"
+    ) -> PlacesPage:
+        """Get a page of restaurants, sorted by name"""
+        print(f"Getting all from {self.collection_name}")
+        return await self._page(query={}, limit=limit, after=after, view=view)
+
+    async def iter_all(
+        self, view: PlaceView = "full", batch_size: int = MONGO_STREAM_BATCH_SIZE
+    ) -> AsyncIterator[Union[Place, PlaceSummary]]:
+        """Iterate over all restaurants sorted by name, batch_size at a time"""
+        print(f"Streaming all from {self.collection_name}")
+        pipeline = build_page_pipeline(query={}, view=view)
+        async for doc in self.collection.aggregate(pipeline, batchSize=batch_size):
+            yield PLACE_VIEWS[view].model_validate(doc, context=TRUSTED)
+
+    async def nearby(
+        self, lat: float, lng: float, radius: float = 1000, limit: int = 20
+    ) -> List[NearbyPlace]:
+        """Get restaurants within radius meters of a point, nearest first"""
+        print(f"Getting places within {radius}m of ({lat}, {lng})")
+        pipeline = build_nearby_pipeline(lat=lat, lng=lng, radius=radius, limit=limit)
+        return [
+            NearbyPlace.model_validate(place, context=TRUSTED)
+            async for place in self.collection.aggregate(pipeline)
+        ]
+
+    async def get_property_list(self, property_name: str) -> List[str]:
+        """Get a list of unique values for a property"""
+        print(f"Getting {property_name} from {self.collection_name}")
+        return await self.collection.distinct(property_name)
+
+    async def get_place_by_place_id(self, place_id: str) -> Place:
+        """Get a restaurant by place_id"""
+        print(f"Getting {place_id} by place_id from {self.collection_name}")
+        result = await self.collection.find_one({"place_id": place_id})
+        return Place.model_validate(result, context=TRUSTED) if result else None
+
+    async def get_places_by_ids(self, ids: List[str]) -> Dict[str, Place]:
+        """Get restaurants by id in a single query"""
+        print(f"Getting {len(ids)} by id from {self.collection_name}")
+        if not ids:
+            return {}
+        cursor = self.collection.find({"id": {"$in": list(ids)}})
+        return {
+            result["id"]: Place.model_validate(result, context=TRUSTED)
+            async for result in cursor
+        }
+
+    async def get_place_by_id(self, id: str) -> Place:
+        """Get a restaurant by id"""
+        print(f"Getting {id} by id from {self.collection_name}")
+        result = await self.collection.find_one({"id": id})
+        return Place.model_validate(result, context=TRUSTED) if result else None
@@ -1,20 +1,249 @@
+import logging
+import os
+import re
+import threading
 import uuid
-from typing import List
+from typing import Dict, List, Set, Tuple, Union
 
+import pymongo
+import pymongo.errors
+import redis
+
+from places.cache.cache import get_places_cache
 from places.service.mongo_utils import get_client, get_collection
-from places.service.places.models import Place
+from places.service.page_utils import decode_after, encode_after
+from places.service.places.models import (
+    PLACE_VIEWS,
+    TRUSTED,
+    DeleteManyResult,
+    NearbyPlace,
+    Place,
+    PlacesPage,
+    PlaceSummary,
+    PlaceView,
+)
 
 # Singleton manager class
 _MANAGER_SINGLETON = None
+_MANAGER_LOCK = threading.Lock()
+
+# GeoJSON point maintained from geometry.location, backs the 2dsphere index
+GEO_FIELD = "geo"
+
+# Lowercased words maintained from each searched field, backs the word indexes
+SEARCH_WORD_FIELDS = {"name": "name_words", "formatted_address": "address_words"}
+
+# Text index over name and formatted_address, replaced by the word indexes
+LEGACY_TEXT_INDEX = "places_text"
+
+logger = logging.getLogger(__name__)
 
 
 def get_manager():
     global _MANAGER_SINGLETON
     if _MANAGER_SINGLETON is None:
-        _MANAGER_SINGLETON = PlacesManager()
+        with _MANAGER_LOCK:
+            if _MANAGER_SINGLETON is None:
+                _MANAGER_SINGLETON = PlacesManager()
     return _MANAGER_SINGLETON
 
 
+def _reset_after_fork() -> None:
+    """Forget the manager in a forked child, so it creates its own client"""
+    global _MANAGER_SINGLETON, _MANAGER_LOCK
+    _MANAGER_SINGLETON = None
+    _MANAGER_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+###################################################################
+# Queries, shared with the async manager                          #
+###################################################################
+
+
+def normalise_search_term(
+    value: str, exact: bool = False, use_regex: bool = False
+) -> str:
+    """Lowercase and collapse the whitespace of a search term when that does not
+    change the results, i.e. for the case insensitive word search. Exact and regex
+    terms are returned as they are."""
+    if value is None or exact or use_regex:
+        return value
+    return " ".join(value.split()).lower()
+
+
+def build_search_words(value: str) -> List[str]:
+    """Split a name or address into the lowercased words it is searched by"""
+    return re.findall(r"\w+", value.lower()) if value else []
+
+
+def build_search_fields(place_dict: Dict) -> Dict[str, List[str]]:
+    """Build the indexed word fields searched instead of name and formatted_address"""
+    return {
+        words_field: build_search_words(place_dict.get(field))
+        for field, words_field in SEARCH_WORD_FIELDS.items()
+    }
+
+
+def build_word_match(field: str, value: str) -> List[Dict]:
+    """Build the clauses matching places where every word of value starts a word of
+    field, case insensitive, served by the multikey index on its words. Falls back
+    to a case insensitive substring match if value has no words (e.g. "&")."""
+    words = build_search_words(value)
+    if not words:
+        return [{field: {"$regex": re.escape(value), "$options": "i"}}]
+    words_field = SEARCH_WORD_FIELDS[field]
+    return [{words_field: {"$regex": f"^{re.escape(word)}"}} for word in words]
+
+
+def build_search_query(
+    name: str = None,
+    address: str = None,
+    min_rating: float = None,
+    exact: bool = False,
+    use_regex: bool = False,
+) -> Dict:
+    """Build the restaurants query for a search, name and address must both match.
+
+    Non exact searches match word prefixes ("piz" finds "Joe's Pizza") on the
+    indexed name_words and address_words unless use_regex is set, which falls back
+    to the (unindexed) case insensitive substring regex.
+    """
+    # assemble query
+    query = {}
+    if min_rating:
+        query["rating"] = {"$gte": min_rating}
+
+    # indexed word prefix search, each field matched on its own
+    if not exact and not use_regex:
+        clauses = []
+        if name:
+            clauses += build_word_match("name", name)
+        if address:
+            clauses += build_word_match("formatted_address", address)
+        if clauses:
+            query["$and"] = clauses
+        return query
+
+    if name:
+        query["name"] = name
+    if address:
+        query["formatted_address"] = address
+
+    # update query for case insensitive search
+    if not exact:
+        query = {
+            k: {"$regex": re.escape(v), "$options": "i"} if isinstance(v, str) else v
+            for k, v in query.items()
+        }
+    return query
+
+
+def build_name_query(name: str, exact: bool = False, use_regex: bool = False) -> Dict:
+    """Build the restaurants query for a lookup by name"""
+    if exact:
+        return {"name": name}
+    if not use_regex:
+        return {"$and": build_word_match("name", name)}
+    return {"name": {"$regex": re.escape(name), "$options": "i"}}
+
+
+def build_stored_place(place: Place) -> Dict:
+    """Document stored for a new place, with a new id and the indexed fields"""
+    place_dict = place.dict()
+    place_dict["id"] = str(uuid.uuid4())
+    place_dict[GEO_FIELD] = build_geo_point(place_dict)
+    place_dict.update(build_search_fields(place_dict))
+    return place_dict
+
+
+def build_search_sort() -> List:
+    """Sort lookups by name"""
+    return [("name", pymongo.ASCENDING)]
+
+
+def build_page_sort() -> List[Tuple[str, int]]:
+    """Total order used to page through results"""
+    return [("name", pymongo.ASCENDING), ("id", pymongo.ASCENDING)]
+
+
+def build_view_projection(view: PlaceView = "full") -> Dict:
+    """Projection for a view, keeping the sort fields needed for the next token"""
+    if view == "full":
+        return None
+    projection = {field: 1 for field in PLACE_VIEWS[view].model_fields}
+    projection.update({field: 1 for field, _ in build_page_sort()})
+    projection["_id"] = 0
+    return projection
+
+
+def build_page_pipeline(
+    query: Dict, limit: int = None, after: str = None, view: PlaceView = "full"
+) -> List:
+    """Build the aggregation for one page of results, keyset paginated on the sort.
+
+    Args:
+        query (Dict): Filter, from build_search_query or {} for everything
+        limit (int, optional): Page size, everything after the token if None
+        after (str, optional): Token from the previous page
+        view (PlaceView, optional): Fields to return, "summary" projects down to the
+            PlaceSummary fields
+    """
+    sort = build_page_sort()
+    pipeline = [{"$match": query}]
+
+    # keyset: strictly after the last result in the sort order
+    if after:
+        values = decode_after(after)
+        if len(values) != len(sort):
+            raise ValueError(f"Invalid after token '{after}'")
+        clauses = []
+        for i, (field, direction) in enumerate(sort):
+            clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+            clause[field] = {"$gt" if direction > 0 else "$lt": values[i]}
+            clauses.append(clause)
+        pipeline.append({"$match": {"$or": clauses}})
+
+    pipeline.append({"$sort": dict(sort)})
+    if limit:
+        pipeline.append({"$limit": limit})
+    projection = build_view_projection(view=view)
+    if projection:
+        pipeline.append({"$project": projection})
+    return pipeline
+
+
+def build_next_after(docs: List[Dict], limit: int = None) -> str:
+    """Token for the page following docs, None if this was the last page"""
+    if not limit or len(docs) < limit:
+        return None
+    return encode_after([docs[-1].get(field) for field, _ in build_page_sort()])
+
+
+def build_geo_point(place_dict: Dict) -> Dict:
+    """Build the GeoJSON point for a place from its Google geometry"""
+    location = place_dict["geometry"]["location"]
+    return {"type": "Point", "coordinates": [location["lng"], location["lat"]]}
+
+
+def build_nearby_pipeline(lat: float, lng: float, radius: float, limit: int) -> List:
+    """Build the aggregation returning the places within radius meters, nearest first"""
+    return [
+        {
+            "$geoNear": {
+                "near": {"type": "Point", "coordinates": [lng, lat]},
+                "key": GEO_FIELD,
+                "distanceField": "distance",
+                "maxDistance": radius,
+                "spherical": True,
+            }
+        },
+        {"$limit": limit},
+    ]
+
+
 ###################################################################
 # Restaurant Manager                                              #
 ###################################################################
@@ -25,6 +254,122 @@ class PlacesManager:
         self.client = get_client()
         self.collection_name = "restaurants"
         self.collection = get_collection(self.client, self.collection_name)
+        self.ensure_indexes()
+
+    ########################################################
+    # Indexes                                              #
+    ########################################################
+
+    def ensure_indexes(self) -> None:
+        """Create the indexes used by queries, a no-op if they already exist"""
+        try:
+            self.collection.create_index([(GEO_FIELD, pymongo.GEOSPHERE)])
+        except pymongo.errors.OperationFailure as e:
+            logger.warning(
+                f"Invalid points in {self.collection_name}, nearby is unavailable "
+                f"until they are fixed: {e}"
+            )
+        self.collection.create_index(
+            [("name", pymongo.ASCENDING), ("id", pymongo.ASCENDING)]
+        )
+        self.collection.create_index("id")
+        for words_field in SEARCH_WORD_FIELDS.values():
+            self.collection.create_index(words_field)
+        if LEGACY_TEXT_INDEX in self.collection.index_information():
+            self.collection.drop_index(LEGACY_TEXT_INDEX)
+        try:
+            self.collection.create_index(
+                "place_id", unique=True, name="place_id_unique"
+            )
+        except pymongo.errors.DuplicateKeyError as e:
+            logger.warning(
+                f"Duplicate place_ids in {self.collection_name}, run "
+                f"drop_duplicate_place_ids to enforce uniqueness: {e}"
+            )
+
+    def drop_duplicate_place_ids(self) -> int:
+        """Keep the first stored restaurant per place_id and drop the rest, so the
+        unique place_id index can be built"""
+        duplicates = self.collection.aggregate(
+            [
+                {"$sort": {"_id": 1}},
+                {"$group": {"_id": "$place_id", "ids": {"$push": "$_id"}}},
+                {"$match": {"ids.1": {"$exists": True}}},
+            ]
+        )
+        drop = [_id for group in duplicates for _id in group["ids"][1:]]
+        if drop:
+            self.collection.delete_many({"_id": {"$in": drop}})
+            self.invalidate_cache()
+        print(f"Dropped {len(drop)} duplicate places from {self.collection_name}")
+        self.ensure_indexes()
+        return len(drop)
+
+    def backfill_geo(self) -> int:
+        """Set the GeoJSON point on places inserted before it was maintained"""
+        result = self.collection.update_many(
+            {GEO_FIELD: {"$exists": False}, "geometry.location": {"$exists": True}},
+            [
+                {
+                    "$set": {
+                        GEO_FIELD: {
+                            "type": "Point",
+                            "coordinates": [
+                                "$geometry.location.lng",
+                                "$geometry.location.lat",
+                            ],
+                        }
+                    }
+                }
+            ],
+        )
+        self.invalidate_cache()
+        print(f"Backfilled {result.modified_count} places in {self.collection_name}")
+        return result.modified_count
+
+    def backfill_search_words(self, batch_size: int = 1000) -> int:
+        """Set the word fields used by search on places inserted before they were
+        maintained"""
+        missing = {
+            "$or": [
+                {words_field: {"$exists": False}}
+                for words_field in SEARCH_WORD_FIELDS.values()
+            ]
+        }
+        projection = {"_id": 1, **{field: 1 for field in SEARCH_WORD_FIELDS}}
+        updated, requests = 0, []
+        for doc in self.collection.find(missing, projection):
+            requests.append(
+                pymongo.UpdateOne(
+                    {"_id": doc["_id"]}, {"$set": build_search_fields(doc)}
+                )
+            )
+            if len(requests) == batch_size:
+                updated += self.collection.bulk_write(requests).modified_count
+                requests = []
+        if requests:
+            updated += self.collection.bulk_write(requests).modified_count
+        self.invalidate_cache()
+        print(f"Backfilled {updated} places in {self.collection_name}")
+        return updated
+
+    ########################################################
+    # Cache                                                #
+    ########################################################
+
+    def invalidate_cache(self) -> None:
+        """Bump the cache generation so no cached places are served after a write"""
+        try:
+            get_places_cache().bump_generation()
+        except redis.RedisError as e:
+            logger.warning(f"Could not invalidate places cache: {e}")
+
+    def evict_cache(self, ids: List[str]) -> None:
+        """Evict deleted places from the cache and bump the cache generation"""
+        try:
+            get_places_cache().evict_places(ids)
+        except redis.RedisError as e:
+            logger.warning(f"Could not evict places from cache: {e}")
 
     ########################################################
     # Drop                                                 #
@@ -34,52 +379,190 @@ class PlacesManager:
         """Drop all restaurants"""
         print(f"Dropping all from {self.collection_name}")
         self.collection.drop()
+        self.ensure_indexes()
+        self.invalidate_cache()
 
     def drop_by_name(self, name: str) -> None:
         """Drop a restaurant by name"""
         self.collection.delete_many({"name": name})
+        self.invalidate_cache()
         print(f"Dropped {name} from {self.collection_name}")
 
     def drop_by_place_id(self, place_id: str) -> None:
         """Drop a restaurant by place_id"""
         self.collection.delete_many({"place_id": place_id})
+        self.invalidate_cache()
         print(f"Dropped {place_id} from {self.collection_name}")
 
     def drop_by_id(self, id: str) -> None:
         """Drop a restaurant by id"""
         self.collection.delete_many({"id": id})
+        self.invalidate_cache()
         print(f"Dropped {id} from {self.collection_name}")
 
+    def drop_many(
+        self,
+        place_ids: List[str] = None,
+        ids: List[str] = None,
+        names: List[str] = None,
+    ) -> DeleteManyResult:
+        """Drop every restaurant matching any of the given place_ids, ids or names.
+
+        One find over the indexed fields picks the matches, one delete_many removes
+        exactly those and one pipeline evicts them from the cache. Each match is
+        counted against the first key that requested it, in the order place_ids,
+        ids, names.
+
+        Args:
+            place_ids (List[str], optional): place_ids to drop. Defaults to None.
+            ids (List[str], optional): ids to drop. Defaults to None.
+            names (List[str], optional): Exact names to drop. Defaults to None.
+        Returns:
+            DeleteManyResult: Total deleted, and deleted counts per key
+        """
+        keys = {"place_id": place_ids or [], "id": ids or [], "name": names or []}
+        counts = {field: dict.fromkeys(values, 0) for field, values in keys.items()}
+        clauses = [
+            {field: {"$in": list(values)}} for field, values in counts.items() if values
+        ]
+        if not clauses:
+            return DeleteManyResult(**counts)
+
+        docs = list(
+            self.collection.find(
+                {"$or": clauses}, {"_id": 1, "id": 1, "place_id": 1, "name": 1}
+            )
+        )
+        if not docs:
+            return DeleteManyResult(**counts)
+        for doc in docs:
+            for field, values in counts.items():
+                if doc.get(field) in values:
+                    values[doc[field]] += 1
+                    break
+
+        # Delete exactly what was counted
+        result = self.collection.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+        self.evict_cache([doc["id"] for doc in docs if doc.get("id")])
+        deleted = result.deleted_count
+        return DeleteManyResult(deleted=deleted, **counts)
+
     ########################################################
     # Insert                                               #
     ########################################################
     def insert(self, place: Place) -> Place:
-        """Insert a restaurant into the database.
+        """Insert a restaurant into the database, unless one with the same
+        place_id is already stored.
         Args:
             place (Place): Place model
+        Returns:
+            Place: The stored place, newly inserted or existing
         """
         print(f"Inserting {place.name} into {self.collection_name}")
         try:
-            place_dict = place.dict()
-            place_dict["id"] = str(uuid.uuid4())
-            self.collection.insert_one(place_dict)
-            return place
+            return self.upsert(place)[0]
         except Exception as e:
             print(f"Error inserting {place.name}: {e}")
 
-    def insert_many(self, places: List[Place]) -> None:
-        """Insert multiple restaurants into the database.
+    def insert_many(self, places: List[Place]) -> int:
+        """Insert multiple restaurants into the database, skipping those whose
+        place_id is already stored.
         Args:
             places (List[Place]): List of Place models
+        Returns:
+            int: Number of distinct place_ids now stored (inserted or existing),
+                as reported by the write, 0 on error
         """
         print(f"Inserting {len(places)} places into {self.collection_name}")
         try:
-            dicts = [p.dict() for p in places]
-            for d in dicts:
-                d["id"] = str(uuid.uuid4())
-            self.collection.insert_many(dicts)
+            return self.upsert_places(places)[1]
+        except pymongo.errors.BulkWriteError as e:
+            print(f"Error inserting places: {e.details['writeErrors']}")
+            return e.details["nUpserted"] + e.details["nMatched"]
         except Exception as e:
             print(f"Error inserting places: {e}")
+            return 0
+
+    def bulk_upsert(self, places: List[Place]) -> Dict[str, Place]:
+        """Insert restaurants that are not already stored in a single unordered
+        bulk_write, the unique place_id index does the duplicate detection.
+
+        Stored restaurants are left untouched, so this is safe to repeat.
+
+        Args:
+            places (List[Place]): List of Place models
+        Returns:
+            Dict[str, Place]: Newly inserted places by place_id, with their new ids
+        Raises:
+            pymongo.errors.BulkWriteError: If any write failed, those that did not
+                are still applied
+        """
+        return self.upsert_places(places)[0]
+
+    def upsert(self, place: Place) -> Tuple[Place, bool]:
+        """Insert a restaurant unless one with the same place_id is already stored,
+        in a single find_one_and_update that returns the stored place either way.
+
+        Args:
+            place (Place): Place model
+        Returns:
+            Tuple[Place, bool]: The stored place, and whether it was inserted
+        """
+        place_dict = build_stored_place(place)
+        place_id = place_dict.pop("place_id")
+        stored = self.collection.find_one_and_update(
+            {"place_id": place_id},
+            {"$setOnInsert": place_dict},
+            upsert=True,
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        # the new id is only there if this write inserted the document
+        inserted = stored["id"] == place_dict["id"]
+        if inserted:
+            self.invalidate_cache()
+        return Place.model_validate(stored, context=TRUSTED), inserted
+
+    def upsert_places(self, places: List[Place]) -> Tuple[Dict[str, Place], int]:
+        """Upsert restaurants as bulk_upsert does.
+
+        Returns:
+            Tuple[Dict[str, Place], int]: Newly inserted places by place_id, and the
+                number of place_ids inserted or already stored
+        Raises:
+            pymongo.errors.BulkWriteError: If any write failed, those that did not
+                are still applied
+        """
+        # one write per place_id, the first wins
+        unique = {}
+        for place in places:
+            unique.setdefault(place.place_id, place)
+        if not unique:
+            return {}, 0
+
+        staged, requests = [], []
+        for place in unique.values():
+            place_dict = build_stored_place(place)
+            place_id = place_dict.pop("place_id")
+            requests.append(
+                pymongo.UpdateOne(
+                    {"place_id": place_id}, {"$setOnInsert": place_dict}, upsert=True
+                )
+            )
+            staged.append(place.model_copy(update={"id": place_dict["id"]}))
+
+        try:
+            result = self.collection.bulk_write(requests, ordered=False)
+        except pymongo.errors.BulkWriteError:
+            self.invalidate_cache()
+            raise
+        if result.upserted_count:
+            self.invalidate_cache()
+        print(
+            f"Upserted {len(staged)} places into {self.collection_name}: "
+            f"{result.upserted_count} new, {result.matched_count} existing"
+        )
+        inserted = {staged[i].place_id: staged[i] for i in result.upserted_ids}
+        return inserted, result.upserted_count + result.matched_count
 
     ########################################################
     # Search                                               #
@@ -91,52 +574,89 @@ class PlacesManager:
         address: str = None,
         min_rating: float = None,
         exact: bool = False,
-    ) -> List[Place]:
-        """Search for a restaurant by query"""
-        # assemble query
-        query = {}
-        if name:
-            query["name"] = name
-        if address:
-            query["formatted_address"] = address
-        if min_rating:
-            query["rating"] = {"$gte": min_rating}
-
-        """Search for a restaurant by query"""
-        # update query for case insensitive search
-        if not exact:
-            query = {
-                k: {"$regex": v, "$options": "i"} if isinstance(v, str) else v
-                for k, v in query.items()
-            }
+        use_regex: bool = False,
+        view: PlaceView = "full",
+    ) -> List[Union[Place, PlaceSummary]]:
+        """Search for a restaurant by query, sorted by name"""
+        return self.search_page(
+            name=name,
+            address=address,
+            min_rating=min_rating,
+            exact=exact,
+            use_regex=use_regex,
+            view=view,
+        ).places
 
-        # query
+    def search_page(
+        self,
+        name: str = None,
+        address: str = None,
+        min_rating: float = None,
+        exact: bool = False,
+        use_regex: bool = False,
+        limit: int = None,
+        after: str = None,
+        view: PlaceView = "full",
+    ) -> PlacesPage:
+        """Get a page of search results, sorted by name"""
+        query = build_search_query(
+            name=name,
+            address=address,
+            min_rating=min_rating,
+            exact=exact,
+            use_regex=use_regex,
+        )
         print(f"Searching for {query} in {self.collection_name}")
-        results = [Place(**place) for place in self.collection.find(query)]
+        return self._page(query=query, limit=limit, after=after, view=view)
 
-        # sort by name
-        results.sort(key=lambda x: x.name)
-        return results
+    def _page(
+        self,
+        query: Dict,
+        limit: int = None,
+        after: str = None,
+        view: PlaceView = "full",
+    ) -> PlacesPage:
+        """Run a keyset paginated query, sorted and limited by Mongo"""
+        pipeline = build_page_pipeline(query=query, limit=limit, after=after, view=view)
+        docs = list(self.collection.aggregate(pipeline))
+        return PlacesPage(
+            places=[
+                PLACE_VIEWS[view].model_validate(doc, context=TRUSTED) for doc in docs
+            ],
+            after=build_next_after(docs=docs, limit=limit),
+        )
 
     ########################################################
     # Get                                                  #
     ########################################################
 
-    def get(self, name: str, exact: bool = False) -> Place:
-        """Get a restaurant by name"""
-        if exact:
-            query = {"name": name}
-        else:
-            query = {"name": {"$regex": name, "$options": "i"}}
+    def get(self, name: str, exact: bool = False, use_regex: bool = False) -> Place:
+        """Get the first restaurant, sorted by name, matching a name"""
+        query = build_name_query(name=name, exact=exact, use_regex=use_regex)
         print(f"Getting {name} from {self.collection_name}")
-        return self.collection.find_one(query)
+        return self.collection.find_one(query, sort=build_search_sort())
+
+    def get_all(self, view: PlaceView = "full") -> List[Union[Place, PlaceSummary]]:
+        """Get all restaurants, sorted by name"""
+        return self.get_all_page(view=view).places
 
-    def get_all(self) -> List[Place]:
-        """Get all restaurants, ensure that names are sorted and unique"""
+    def get_all_page(
+        self, limit: int = None, after: str = None, view: PlaceView = "full"
+    ) -> PlacesPage:
+        """Get a page of restaurants, sorted by name"""
         print(f"Getting all from {self.collection_name}")
-        results = [Place(**place) for place in self.collection.find()]
-        results.sort(key=lambda x: x.name)
-        return results
+        return self._page(query={}, limit=limit, after=after, view=view)
+
+    def nearby(
+        self, lat: float, lng: float, radius: float = 1000, limit: int = 20
+    ) -> List[NearbyPlace]:
+        """Get restaurants within radius meters of a point, nearest first"""
+        print(f"Getting places within {radius}m of ({lat}, {lng})")
+        pipeline = build_nearby_pipeline(lat=lat, lng=lng, radius=radius, limit=limit)
+        return [
+            NearbyPlace.model_validate(place, context=TRUSTED)
+            for place in self.collection.aggregate(pipeline)
+        ]
 
     def get_property_list(self, property_name: str) -> List[str]:
         """Get a list of unique values for a property"""
@@ -147,10 +667,29 @@ class PlacesManager:
         """Get a restaurant by place_id"""
         print(f"Getting {place_id} by place_id from {self.collection_name}")
         result = self.collection.find_one({"place_id": place_id})
-        return Place(**result) if result else None
+        return Place.model_validate(result, context=TRUSTED) if result else None
+
+    def get_places_by_place_ids(self, place_ids: List[str]) -> Dict[str, Place]:
+        """Get restaurants by place_id in a single query"""
+        print(f"Getting {len(place_ids)} by place_id from {self.collection_name}")
+        if not place_ids:
+            return {}
+        results = self.collection.find({"place_id": {"$in": list(place_ids)}})
+        return {
+            result["place_id"]: Place.model_validate(result, context=TRUSTED)
+            for result in results
+        }
+
+    def get_existing_ids(self, ids: List[str]) -> Set[str]:
+        """Get which of the given ids belong to a restaurant, in a single query"""
+        print(f"Checking {len(ids)} ids in {self.collection_name}")
+        if not ids:
+            return set()
+        results = self.collection.find({"id": {"$in": list(ids)}}, {"_id": 0, "id": 1})
+        return {result["id"] for result in results}
 
     def get_place_by_id(self, id: str) -> Place:
         """Get a restaurant by place_id"""
         print(f"Getting {id} by id from {self.collection_name}")
         result = self.collection.find_one({"id": id})
-        return Place(**result) if result else None
+        return Place.model_validate(result, context=TRUSTED) if result else None
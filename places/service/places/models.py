@@ -1,6 +1,9 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationInfo, model_validator
+
+# Validation context for documents written from a normalised Place (Mongo, cache)
+TRUSTED = {"trusted": True}
 
 
 class PlaceInsertModel(BaseModel):
@@ -65,10 +68,19 @@ class Place(BaseModel):
     # Processed fields
     reservation_url: Optional[str] = None
 
-    def __init__(self, **data):
-        """Ensure that all fields are set, allow none accounting for messy data."""
-        fields = set(Place.__fields__.keys())
-        for field in fields:
+    @model_validator(mode="before")
+    @classmethod
+    def normalise(cls, data: Any, info: ValidationInfo) -> Any:
+        """Ensure that all fields are set, allow none accounting for messy data.
+
+        Skipped for documents validated with the TRUSTED context, which we wrote
+        ourselves from an already normalised Place.
+        """
+        if not isinstance(data, dict) or (info.context or {}).get("trusted"):
+            return data
+
+        data = dict(data)
+        for field in cls.model_fields:
             if field not in data:
                 data[field] = None
 
@@ -78,11 +90,73 @@ class Place(BaseModel):
             data[
                 "reservation_url"
             ] = f"https://www.google.com/maps/place/?q=place_id:{data['place_id']}"
+        return data
+
+    def __str__(self):
+        return f"{self.name} - {self.formatted_address} - {self.rating}"
+
+    def __repr__(self):
+        return self.name
+
+
+class NearbyPlace(Place):
+    """Place returned by a nearby search"""
+
+    # Meters from the queried point
+    distance: float
+
+
+class PlaceSummary(BaseModel):
+    """Fields of a place shown in list views, fetched with a projection"""
+
+    id: str
+    name: str
+    place_id: Optional[str] = None
+    formatted_address: Optional[str] = None
+    business_status: Optional[str] = None
+    rating: Optional[float] = None
+    user_ratings_total: Optional[int] = None
+    price_level: Optional[int] = None
+    collection: Optional[str] = None
+    reservation_url: Optional[str] = None
 
-        super().__init__(**data)
+    @classmethod
+    def from_place(cls, place: Place) -> "PlaceSummary":
+        """Summarise a full place"""
+        return cls(**place.dict(include=set(cls.model_fields)))
 
     def __str__(self):
         return f"{self.name} - {self.formatted_address} - {self.rating}"
 
     def __repr__(self):
         return self.name
+
+
+# Views a list of places can be returned in, and the model for each
+PlaceView = Literal["full", "summary"]
+PLACE_VIEWS = {"full": Place, "summary": PlaceSummary}
+
+
+class PlacesPage(BaseModel):
+    """Page of places, after is the token for the next page or None if last"""
+
+    places: List[Union[Place, PlaceSummary]]
+    after: Optional[str] = None
+
+
+class EnrichmentResult(BaseModel):
+    """Outcome of looking up (and adding) one place, error is set on failure"""
+
+    name: str
+    location: Optional[str] = None
+    place: Optional[Place] = None
+    error: Optional[str] = None
+
+
+class DeleteManyResult(BaseModel):
+    """Places deleted by a bulk delete, with deleted counts per requested key"""
+
+    deleted: int = 0
+    place_id: Dict[str, int] = {}
+    id: Dict[str, int] = {}
+    name: Dict[str, int] = {}
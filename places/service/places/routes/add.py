@@ -3,22 +3,23 @@ import logging
 import os
 from typing import Dict, List
 
-from fastapi import APIRouter, HTTPException
+import pymongo.errors
+from fastapi import APIRouter, Depends, HTTPException
 
-from places.google.google import get_restaurant_info
-from places.service.places.manager import get_manager
-from places.service.places.models import Place, PlaceInsertModel
+from constants import GOOGLE_MAX_WORKERS
+from places.google.google import enrich_many, get_restaurant_info
+from places.service.dependencies import get_places_manager
+from places.service.places.manager import PlacesManager
+from places.service.places.models import EnrichmentResult, Place, PlaceInsertModel
 
 # Constants
-manager = get_manager()
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.post("/add")
 def add(
-    name: str,
-    location: str,
+    name: str, location: str, manager: PlacesManager = Depends(get_places_manager)
 ) -> Place:
     """Add a restaurant to the database.
 
@@ -40,31 +41,67 @@ def add(
             status_code=404, detail=f"Could not find '{name}' at '{location}'"
         )
 
-    # if the place is already in the database, raise an error
-    existing = manager.get_place_by_place_id(new_place.place_id)
-    if existing:
-        print(existing)
-        print(f"Already contains '{existing.name}' at '{existing.formatted_address}'")
-        return manager.get_place_by_place_id(new_place.place_id)
+    # insert unless the place is already in the database, then return that one
+    try:
+        stored, inserted = manager.upsert(new_place)
+    except pymongo.errors.PyMongoError as e:
+        logger.error(f"Could not add {name}: {e}")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Could not add '{name}' at '{location}', please try again",
+        )
+    if not inserted:
+        print(f"Already contains '{stored.name}' at '{stored.formatted_address}'")
+        return stored
 
-    new_place = manager.insert(new_place)
-    print(f"Inserted '{new_place}'")
-    return new_place
+    print(f"Inserted '{stored}'")
+    return stored
 
 
 @router.post("/add/many")
-def add_many(places: List[PlaceInsertModel]) -> List[Place]:
+def add_many(
+    places: List[PlaceInsertModel],
+    max_workers: int = GOOGLE_MAX_WORKERS,
+    manager: PlacesManager = Depends(get_places_manager),
+) -> List[EnrichmentResult]:
     """Add multiple restaurants to the database.
 
     Args:
-        places (List[Dict[str, str]]): List of restaurants to add
+        places (List[PlaceInsertModel]): List of restaurants to add
+        max_workers (int, optional): Concurrent Google lookups. Defaults to
+            GOOGLE_MAX_WORKERS.
+
+    Returns:
+        List[EnrichmentResult]: One result per restaurant, with the added (or
+            already existing) place or the reason it could not be added
     """
     print(f"Adding {len(places)} places")
-    new_places = []
-    for place in places:
-        try:
-            new_place = add(name=place["name"], location=place["location"])
-            new_places.append(new_place)
-        except Exception as e:
-            logger.error(f"Could not add {place}: {e}")
-    return new_places
+    results = enrich_many(
+        [place.dict() for place in places],
+        max_workers=min(max_workers, GOOGLE_MAX_WORKERS),
+    )
+
+    found = []
+    for result in results:
+        if result.error:
+            logger.error(f"Could not add {result.name}: {result.error}")
+            continue
+        found.append(result)
+
+    # insert everything found in one bulk write, then fetch those already stored
+    try:
+        inserted = manager.bulk_upsert([result.place for result in found])
+    except pymongo.errors.BulkWriteError as e:
+        logger.error(f"Could not add some places: {e.details['writeErrors']}")
+        inserted = {}
+    stored = manager.get_places_by_place_ids(
+        [r.place.place_id for r in found if r.place.place_id not in inserted]
+    )
+    stored.update(inserted)
+
+    for result in found:
+        result.place = stored.get(result.place.place_id)
+        if result.place is None:
+            logger.error(f"Could not add {result.name}")
+            result.error = "Could not add place"
+    return results
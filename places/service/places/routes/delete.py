@@ -3,18 +3,21 @@ import logging
 import os
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Response
 
-from places.service.places.manager import get_manager
+from places.service.dependencies import get_places_manager
+from places.service.places.manager import PlacesManager
+from places.service.places.models import DeleteManyResult
 
 # Constants
-manager = get_manager()
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.delete("/delete")
-def delete(place_id: str, name: str) -> Response:
+def delete(
+    place_id: str, name: str, manager: PlacesManager = Depends(get_places_manager)
+) -> Response:
     """Simple, delete single place."""
     # Raise errors if no place_id or name provided
     if not place_id and not name:
@@ -43,47 +46,23 @@ def delete(place_id: str, name: str) -> Response:
 
 
 @router.delete("/delete/many")
-def delete_many(place_ids: List[str], names: List[str]) -> Response:
-    """Simple, delete multiple places."""
-    # Raise errors if no place_ids or names provided
-    if not place_ids and not names:
-        raise HTTPException(
-            status_code=400,
-            detail="Please provide `place_ids` or `names` to delete.",
-        )
-
-    successful_deletes = []
-    failed_deletes = []
-
-    # Conditional delete by place_ids or names
-    if place_ids:
-        print(f"Deleting places {place_ids} by place_ids")
-        for place_id in place_ids:
-            try:
-                manager.drop_by_place_id(place_id=place_id)
-                successful_deletes.append(place_id)
-            except Exception as e:
-                failed_deletes.append((place_id, e))
-                pass
-    elif names:
-        print(f"Deleting places {names} by names")
-        for name in names:
-            try:
-                manager.drop_by_place_id(name=name)
-                successful_deletes.append(name)
-            except Exception as e:
-                failed_deletes.append((name, e))
-                pass
+def delete_many(
+    place_ids: List[str] = None,
+    ids: List[str] = None,
+    names: List[str] = None,
+    manager: PlacesManager = Depends(get_places_manager),
+) -> DeleteManyResult:
+    """Delete multiple places by place_id, id or exact name in a single request.
 
-    # If any failed, raise error
-    if len(failed_deletes) > 0:
+    Returns:
+        DeleteManyResult: Total deleted, and deleted counts per key
+    """
+    # Raise errors if no place_ids, ids or names provided
+    if not place_ids and not ids and not names:
         raise HTTPException(
             status_code=400,
-            detail=f"Failed to delete places: {failed_deletes}",
+            detail="Please provide `place_ids`, `ids` or `names` to delete.",
         )
 
-    # If all successful, return success and list of successful deletes
-    content = {
-        "successful_deletes": successful_deletes,
-    }
-    return Response(status_code=200, content=content)
+    print(f"Deleting places by place_ids {place_ids}, ids {ids} and names {names}")
+    return manager.drop_many(place_ids=place_ids, ids=ids, names=names)
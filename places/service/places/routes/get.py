@@ -9,115 +9,374 @@ Then open your browser and go to:
 
 # Standard Library
 import logging
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Union
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 
-from constants import GOOGLE_API_KEY
-from places.cache.cache import get_places_cache
-from places.service.places.manager import get_manager
-from places.service.places.models import APIKey, Place
+from constants import (
+    GOOGLE_API_KEY,
+    PLACES_MAX_PAGE_SIZE,
+    PLACES_NEXT_PAGE_HEADER,
+    REDIS_SEARCH_TTL_SECONDS,
+    REDIS_TTL_SECONDS,
+)
+from places.cache.cache import Cache
+from places.cache.keys import build_key
+from places.google.client import lookup_stats
+from places.google.lookup_cache import get_lookup_cache
+from places.service.dependencies import get_async_places_manager, get_cache
+from places.service.mongo_utils import get_pool_stats
+from places.service.places.async_manager import AsyncPlacesManager
+from places.service.places.manager import (
+    build_next_after,
+    build_page_sort,
+    normalise_search_term,
+)
+from places.service.places.models import (
+    APIKey,
+    NearbyPlace,
+    Place,
+    PlaceSummary,
+    PlaceView,
+)
+from places.service.stream_utils import ndjson_response, wants_ndjson
 
-places_cache = get_places_cache()
-manager = get_manager()
 router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
 
+def summarise(
+    places: List[Place], view: PlaceView
+) -> Union[List[Place], List[PlaceSummary]]:
+    """Convert cached full places to the requested view."""
+    if view == "summary":
+        return [PlaceSummary.from_place(place) for place in places]
+    return places
+
+
+async def get_cached(
+    places_cache: Cache, manager: AsyncPlacesManager, key: str, generation: int
+) -> Optional[List[Place]]:
+    """Get a cached list of places, fetching only the places evicted from the cache
+    from the DB (and caching them again). None if the list is not cached.
+
+    Args:
+        places_cache (Cache): Places cache
+        manager (AsyncPlacesManager): Manager to fetch evicted places with
+        key (str): Lookup or list key, from build_key
+        generation (int): Generation read before the request touched the DB
+    """
+    cached = await run_in_threadpool(places_cache.get_list, key, generation)
+    if cached is None:
+        return None
+
+    ids, places = cached
+    missing = [id for id, place in zip(ids, places) if place is None]
+    if missing:
+        found = await manager.get_places_by_ids(missing)
+        if len(found) < len(set(missing)):
+            # deleted since it was cached, rebuild the whole list
+            return None
+        await run_in_threadpool(places_cache.set_many_places, list(found.values()))
+        places = [place or found[id] for id, place in zip(ids, places)]
+    return places
+
+
+def check_limit(limit: Optional[int]) -> int:
+    """Default a page size to PLACES_MAX_PAGE_SIZE, raising a 400 if it is not
+    between 1 and PLACES_MAX_PAGE_SIZE."""
+    limit = PLACES_MAX_PAGE_SIZE if limit is None else limit
+    if not 0 < limit <= PLACES_MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Please provide a limit between 1 and {PLACES_MAX_PAGE_SIZE}",
+        )
+    return limit
+
+
+async def fetch_page(
+    fetch: Callable,
+    response: Response,
+    limit: int,
+    after: Optional[str] = None,
+    view: PlaceView = "full",
+    places_cache: Cache = None,
+    manager: AsyncPlacesManager = None,
+    cache_key: str = None,
+    force: bool = False,
+    ttl: int = REDIS_TTL_SECONDS,
+    **params,
+) -> Union[List[Place], List[PlaceSummary]]:
+    """Fetch one keyset page, setting the next page token as a response header.
+
+    If a cache_key is given the first page (no after token) is cached as full
+    places, the summary view is derived from them.
+
+    Args:
+        fetch (Callable): Manager page method, e.g. manager.get_all_page
+        response (Response): Response to set the next page header on
+        limit (int): Page size, from check_limit
+        after (str, optional): Token from the previous page. Defaults to None.
+        view (PlaceView, optional): Fields to return. Defaults to "full".
+        places_cache (Cache, optional): Places cache. Defaults to None.
+        manager (AsyncPlacesManager, optional): Manager to fetch evicted places
+            with. Defaults to None.
+        cache_key (str, optional): Key of the first page, built with the page size.
+            Defaults to None, not cached.
+        force (bool, optional): Bypass the cached first page, refreshing it.
+            Defaults to False.
+        ttl (int, optional): Seconds the first page is cached for. Defaults to
+            REDIS_TTL_SECONDS.
+    """
+    cached, generation = None, None
+    if cache_key is not None and after is None:
+        # Read the generation before the DB so a write in the meantime is not
+        # hidden behind stale results
+        generation = await run_in_threadpool(places_cache.get_generation)
+        if not force:
+            cached = await get_cached(places_cache, manager, cache_key, generation)
+    if cached:
+        print(f"Getting page of places from cache")
+        sort_fields = {field for field, _ in build_page_sort()}
+        next_after = build_next_after(
+            docs=[place.model_dump(include=sort_fields) for place in cached],
+            limit=limit,
+        )
+        if next_after:
+            response.headers[PLACES_NEXT_PAGE_HEADER] = next_after
+        return summarise(cached, view=view)
+
+    try:
+        page = await fetch(limit=limit, after=after, view=view, **params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page.after:
+        response.headers[PLACES_NEXT_PAGE_HEADER] = page.after
+
+    # Only full places are cached
+    if generation is not None and page.places and view == "full":
+        print(f"Updating page of places in cache")
+        await run_in_threadpool(
+            places_cache.set_places,
+            cache_key,
+            page.places,
+            ttl=ttl,
+            generation=generation,
+        )
+    return page.places
+
+
 @router.get("/all")
-def get_all(force: bool = True) -> List[Place]:
-    """Get all restaurants. Only use force if you want to bypass the cache."""
-    # If force is not set then check the cache
-    if not force:
-        cached_entry = places_cache.get_places("all")
-        if cached_entry:
-            print(f"Getting all places from cache")
-            return cached_entry
-
-    # If not in cache then get from manager directly
-    print(f"Getting all places from DB")
-    all_places = manager.get_all()
-
-    # Update the cache as we go then
-    if all_places:
-        print(f"Updating all places in cache")
-        places_cache.set_places("all", all_places)
+async def get_all(
+    response: Response,
+    force: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    view: PlaceView = "full",
+    stream: bool = False,
+    accept: Optional[str] = Header(None),
+    manager: AsyncPlacesManager = Depends(get_async_places_manager),
+    places_cache: Cache = Depends(get_cache),
+) -> Union[List[Place], List[PlaceSummary]]:
+    """Get restaurants sorted by name a page at a time, use force to bypass the
+    cache.
 
-    # Return
-    return all_places
+    Args:
+        force (bool, optional): Bypass the cache. Defaults to False.
+        limit (int, optional): Page size, at most PLACES_MAX_PAGE_SIZE. Defaults to
+            PLACES_MAX_PAGE_SIZE.
+        after (str, optional): Token from the X-Next-After header of the previous
+            page. Defaults to None.
+        view (PlaceView, optional): "summary" returns only the fields shown in list
+            views, projected in the DB. Defaults to "full".
+        stream (bool, optional): Stream every place one per line as NDJSON straight
+            from the DB cursor, also used if the Accept header asks for
+            application/x-ndjson. Defaults to False.
+    """
+    # Streams iterate the cursor so memory stays flat, bypassing the cache
+    if wants_ndjson(stream=stream, accept=accept):
+        print(f"Streaming all places from DB")
+        return ndjson_response(manager.iter_all(view=view))
+
+    # Pages are keyset queries on the (name, id) index, the first is cached
+    limit = check_limit(limit)
+    print(f"Getting page of places")
+    return await fetch_page(
+        manager.get_all_page,
+        response=response,
+        limit=limit,
+        after=after,
+        view=view,
+        places_cache=places_cache,
+        manager=manager,
+        cache_key=build_key("all", limit=limit),
+        force=force,
+    )
 
 
 @router.get("/get")
-def get_one(name: str, exact: bool = False) -> Optional[Place]:
-    """Get one restaurant by name
+async def get_one(
+    name: str,
+    exact: bool = False,
+    use_regex: bool = False,
+    manager: AsyncPlacesManager = Depends(get_async_places_manager),
+    places_cache: Cache = Depends(get_cache),
+) -> Optional[Place]:
+    """Get one restaurant by name, the first match sorted by name
 
     Args:
         name (str): Name of the restaurant to get
         exact (bool, optional): Exact match for name. Defaults to False.
+        use_regex (bool, optional): Use the unindexed regex match instead of the
+            word index. Defaults to False.
     """
-    # First check the cache
-    cached_entry = places_cache.get_place(name)
+    # First check the cache, keyed on the same normalised name that is queried
+    name = normalise_search_term(name, exact=exact, use_regex=use_regex)
+    get_key = build_key("get", name=name, exact=exact, use_regex=use_regex)
+    generation = await run_in_threadpool(places_cache.get_generation)
+    cached_entry = await get_cached(places_cache, manager, get_key, generation)
     if cached_entry:
         print(f"Getting {name} from cache")
-        return cached_entry
+        return cached_entry[0]
 
     # If not in cache then get from manager
     print(f"Getting {name} from DB")
-    entry = manager.get(name=name, exact=exact)
+    entry = await manager.get(name=name, exact=exact, use_regex=use_regex)
 
     # Add to cache
     if entry:
         print(f"Updating {name} in cache")
-        places_cache.set_place(name, entry)
+        await run_in_threadpool(
+            places_cache.set_place,
+            get_key,
+            entry,
+            ttl=REDIS_SEARCH_TTL_SECONDS,
+            generation=generation,
+        )
 
     # Return
     return entry
 
 
 @router.get("/search")
-def search(
+async def search(
+    response: Response,
     name: Optional[str] = None,
     address: Optional[str] = None,
     min_rating: Optional[float] = None,
     exact: bool = False,
-) -> List[Place]:
-    """Search for a restaurant by name.
+    use_regex: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    view: PlaceView = "full",
+    manager: AsyncPlacesManager = Depends(get_async_places_manager),
+    places_cache: Cache = Depends(get_cache),
+) -> Union[List[Place], List[PlaceSummary]]:
+    """Search for restaurants by name, address and rating, sorted by name.
 
     Args:
         name (str, optional): Name of the restaurant to lookup. Defaults to None.
         address (str, optional): Address of the restaurant to lookup. Defaults to None.
         min_rating (float, optional): Minimum rating for the restaurant. Defaults to None.
         exact (bool, optional): Exact match for name. Defaults to False.
+        use_regex (bool, optional): Use the unindexed regex match instead of the
+            word index. Defaults to False.
+        limit (int, optional): Page size, at most PLACES_MAX_PAGE_SIZE. Defaults to
+            PLACES_MAX_PAGE_SIZE.
+        after (str, optional): Token from the X-Next-After header of the previous
+            page. Defaults to None.
+        view (PlaceView, optional): "summary" returns only the fields shown in list
+            views, projected in the DB. Defaults to "full".
     """
     if not name and not address and not min_rating:
         logger.error("Please provide a name or address or min_rating")
         return []
 
-    # Check the cache, using a dict to store the search parameters and hashing it as the key
-    search_params = {"name": name, "address": address, "min_rating": min_rating}
-    search_key = hash(str(search_params))
-    cached_entry = places_cache.get_places(search_key)
-    if cached_entry:
-        print(f"Getting search results from cache")
-        return cached_entry
+    # Cache keys and queries both use the normalised terms
+    name = normalise_search_term(name, exact=exact, use_regex=use_regex)
+    address = normalise_search_term(address, exact=exact, use_regex=use_regex)
 
-    # If not in cache then get from manager
-    print(f"Searching for {name} at {address} with min rating {min_rating}")
-    results = manager.search(
-        name=name, address=address, min_rating=min_rating, exact=exact
+    # Pages are keyset queries, the first is cached
+    limit = check_limit(limit)
+    print(f"Searching for page of {name} at {address} with min rating {min_rating}")
+    search_key = build_key(
+        "search",
+        name=name,
+        address=address,
+        min_rating=min_rating,
+        exact=exact,
+        use_regex=use_regex,
+        limit=limit,
+    )
+    return await fetch_page(
+        manager.search_page,
+        response=response,
+        limit=limit,
+        after=after,
+        view=view,
+        places_cache=places_cache,
+        manager=manager,
+        cache_key=search_key,
+        ttl=REDIS_SEARCH_TTL_SECONDS,
+        name=name,
+        address=address,
+        min_rating=min_rating,
+        exact=exact,
+        use_regex=use_regex,
     )
 
-    # Add to cache
-    if results:
-        print(f"Updating search results in cache")
-        places_cache.set_places(search_key, results)
 
-    # Return
-    return results
+@router.get("/nearby")
+async def nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = 1000,
+    limit: int = 20,
+    manager: AsyncPlacesManager = Depends(get_async_places_manager),
+) -> List[NearbyPlace]:
+    """Get restaurants near a point, sorted by distance.
+
+    Args:
+        lat (float): Latitude of the point to search around
+        lng (float): Longitude of the point to search around
+        radius (float, optional): Maximum distance in meters. Defaults to 1000.
+        limit (int, optional): Maximum number of places to return, at most
+            PLACES_MAX_PAGE_SIZE. Defaults to 20.
+    """
+    if radius <= 0:
+        raise HTTPException(status_code=400, detail="Please provide a positive radius")
+    limit = check_limit(limit)
+
+    print(f"Getting places within {radius}m of ({lat}, {lng})")
+    return await manager.nearby(lat=lat, lng=lng, radius=radius, limit=limit)
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    places_cache: Cache = Depends(get_cache),
+) -> Dict[str, Dict[str, int]]:
+    """Get hit / miss counters for the local and redis cache tiers."""
+    return places_cache.stats()
+
+
+@router.get("/google/stats")
+def get_google_stats() -> Dict[str, Dict[str, Union[int, float, str]]]:
+    """Get lookup counts and latency for the Google Places API, and hit / miss
+    counters for the lookup cache in front of it. Sync as creating the lookup
+    cache pings Redis, so it runs in the threadpool."""
+    return {"lookups": lookup_stats.snapshot(), "cache": get_lookup_cache().stats()}
+
+
+@router.get("/mongo/stats")
+async def get_mongo_stats() -> Dict[str, Dict[str, float]]:
+    """Get connection pool counters for the shared MongoDB clients."""
+    return get_pool_stats()
 
 
 @router.get("/keys/google")
-def get_google_api_key() -> APIKey:
+async def get_google_api_key() -> APIKey:
     """Get the Google api key."""
     return APIKey(key=GOOGLE_API_KEY)
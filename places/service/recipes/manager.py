@@ -1,18 +1,32 @@
 import logging
+import os
+import threading
 import uuid
-from typing import List
+from typing import Dict, Iterator, List
 
+import pymongo
+import pymongo.errors
+from pydantic import BaseModel
+from pymongo.collation import Collation, CollationStrength
+
+from constants import MONGO_STREAM_BATCH_SIZE, RECIPES_SEARCH_LIMIT
 from places.service.mongo_utils import get_client, get_collection
 from places.service.recipes.models import (
     Ingredient,
     Instruction,
     Note,
     RecipeModel,
+    RecipeSearchModel,
+    RecipeSearchResult,
     RecipesModel,
 )
 
 # Singleton manager class
 _MANAGER_SINGLETON = None
+_MANAGER_LOCK = threading.Lock()
+
+# Recipe names are unique and looked up ignoring case
+NAME_COLLATION = Collation(locale="en", strength=CollationStrength.SECONDARY)
 
 logger = logging.getLogger(__name__)
 
@@ -20,15 +34,162 @@ logger = logging.getLogger(__name__)
 def get_manager():
     global _MANAGER_SINGLETON
     if _MANAGER_SINGLETON is None:
-        _MANAGER_SINGLETON = RecipeManager()
+        with _MANAGER_LOCK:
+            if _MANAGER_SINGLETON is None:
+                _MANAGER_SINGLETON = RecipeManager()
     return _MANAGER_SINGLETON
 
 
+def _reset_after_fork() -> None:
+    """Forget the manager in a forked child, so it creates its own client"""
+    global _MANAGER_SINGLETON, _MANAGER_LOCK
+    _MANAGER_SINGLETON = None
+    _MANAGER_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def assign_ids(recipe: RecipeModel) -> RecipeModel:
+    """Give every note, ingredient and instruction of a recipe an id if it has none"""
+    for item in [*recipe.notes, *recipe.ingredients, *recipe.instructions]:
+        if item.id is None:
+            item.id = str(uuid.uuid4())
+    return recipe
+
+
+def normalise_ingredient(name: str) -> str:
+    """Normalise a searched ingredient name, stored names are compared as they are
+    under NAME_COLLATION so only case is ignored"""
+    return name.strip().lower()
+
+
+def build_search_pipeline(ingredients: List[str], limit: int) -> List[Dict]:
+    """Build an aggregation ranking recipes by how many of their ingredients are in
+    ingredients.
+
+    The $match on ingredients.name uses the ingredients_name index (run it with
+    NAME_COLLATION), so only recipes with at least one of the ingredients are read.
+    Those are ranked by coverage, the share of their ingredients that were searched
+    for, then by the number matched.
+
+    Args:
+        ingredients (List[str]): Normalised ingredient names
+        limit (int): Maximum number of recipes to return
+    """
+    # compared exactly as the $match compares them, so every matched ingredient
+    # is counted and none that was not. The names are user input, $literal keeps
+    # one starting with $ from being read as a field path or variable
+    have = {"$in": [{"$toLower": "$$this.name"}, {"$literal": ingredients}]}
+    return [
+        {"$match": {"ingredients.name": {"$in": ingredients}}},
+        {
+            "$addFields": {
+                "missing": {
+                    "$map": {
+                        "input": {
+                            "$filter": {
+                                "input": "$ingredients",
+                                "cond": {"$not": have},
+                            }
+                        },
+                        "in": "$$this.name",
+                    }
+                },
+                "total": {"$size": "$ingredients"},
+            }
+        },
+        {"$addFields": {"matched": {"$subtract": ["$total", {"$size": "$missing"}]}}},
+        {"$addFields": {"coverage": {"$divide": ["$matched", "$total"]}}},
+        {"$sort": {"coverage": -1, "matched": -1, "name": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "total": 0}},
+    ]
+
+
+def build_merge_update(field: str, items: List[BaseModel]) -> List[Dict]:
+    """Build an update pipeline merging items into the field array of a recipe by id.
+
+    Items whose id is already in the array replace it in place, the rest are
+    appended in order. Runs as a single atomic update, deciding what exists from
+    the stored document rather than a copy read earlier.
+
+    Args:
+        field (str): Array to merge into, e.g. "instructions"
+        items (List[BaseModel]): Items with an id, the last wins if one repeats
+    """
+    docs = {"$literal": list({item.id: item.dict() for item in items}.values())}
+    replacement = {
+        "$arrayElemAt": [
+            {
+                "$filter": {
+                    "input": docs,
+                    "as": "doc",
+                    "cond": {"$eq": ["$$doc.id", "$$item.id"]},
+                }
+            },
+            0,
+        ]
+    }
+    merged = {
+        "$concatArrays": [
+            # replace the items that exist
+            {
+                "$map": {
+                    "input": "$$current",
+                    "as": "item",
+                    "in": {"$ifNull": [replacement, "$$item"]},
+                }
+            },
+            # then append the ones that do not
+            {
+                "$filter": {
+                    "input": docs,
+                    "as": "doc",
+                    "cond": {"$not": {"$in": ["$$doc.id", "$$current.id"]}},
+                }
+            },
+        ]
+    }
+    return [
+        {
+            "$set": {
+                field: {
+                    "$let": {
+                        "vars": {"current": {"$ifNull": [f"${field}", []]}},
+                        "in": merged,
+                    }
+                }
+            }
+        }
+    ]
+
+
 class RecipeManager:
     def __init__(self):
         self.client = get_client()
         self.collection_name = "recipes"
         self.collection = get_collection(self.client, self.collection_name)
+        self.ensure_indexes()
+
+    def ensure_indexes(self) -> None:
+        """Create the unique indexes add_recipe relies on and the ingredients index
+        search uses, a no-op if they exist"""
+        self.collection.create_index(
+            "ingredients.name", collation=NAME_COLLATION, name="ingredients_name"
+        )
+        unique = [
+            ("id", {"name": "id_unique"}),
+            ("name", {"collation": NAME_COLLATION, "name": "name_unique"}),
+        ]
+        for field, options in unique:
+            try:
+                self.collection.create_index(field, unique=True, **options)
+            except pymongo.errors.DuplicateKeyError as e:
+                logger.warning(
+                    f"Duplicate recipe {field}s in {self.collection_name}, uniqueness "
+                    f"is not enforced until they are removed: {e}"
+                )
 
     ########################################################
     # Delete                                               #
@@ -78,6 +239,17 @@ class RecipeManager:
         recipes = self.collection.find()
         return RecipesModel(recipes=[RecipeModel(**recipe) for recipe in recipes])
 
+    def iter_all(
+        self, batch_size: int = MONGO_STREAM_BATCH_SIZE
+    ) -> Iterator[RecipeModel]:
+        """Iterate over all recipes, batch_size at a time.
+        Args:
+            batch_size (int): Recipes fetched per round trip
+        """
+        print(f"Streaming all recipes")
+        for recipe in self.collection.find().batch_size(batch_size):
+            yield RecipeModel(**recipe)
+
     def get(self, recipe_id: str) -> RecipeModel:
         """Get a single RecipeModel by id
         Args:
@@ -88,78 +260,102 @@ class RecipeManager:
         return RecipeModel(**recipe)
 
     def get_by_name(self, name: str) -> RecipesModel:
-        """Get all recipes by name
+        """Get all recipes by name, ignoring case
         Args:
             name (str): Recipe name
         """
         print(f"Getting recipes for {name}")
-        recipes = self.collection.find({"name": name})
+        recipes = self.collection.find({"name": name}, collation=NAME_COLLATION)
         return RecipesModel(recipes=[RecipeModel(**recipe) for recipe in recipes])
 
+    def search(
+        self, ingredients: List[str], limit: int = RECIPES_SEARCH_LIMIT
+    ) -> RecipeSearchModel:
+        """Find recipes using any of the ingredients, those needing the fewest others
+        first.
+        Args:
+            ingredients (List[str]): Ingredient names, case is ignored
+            limit (int): Maximum number of recipes to return
+        """
+        ingredients = sorted({normalise_ingredient(name) for name in ingredients})
+        ingredients = [name for name in ingredients if name]
+        print(f"Searching recipes for {len(ingredients)} ingredients")
+        if not ingredients:
+            return RecipeSearchModel()
+
+        pipeline = build_search_pipeline(ingredients=ingredients, limit=limit)
+        results = self.collection.aggregate(pipeline, collation=NAME_COLLATION)
+        return RecipeSearchModel(
+            results=[
+                RecipeSearchResult(
+                    coverage=result.pop("coverage"),
+                    matched=result.pop("matched"),
+                    missing=result.pop("missing"),
+                    recipe=RecipeModel(**result),
+                )
+                for result in results
+            ]
+        )
+
     ########################################################
     # Add                                                  #
     ########################################################
 
     def add_recipe(self, recipe: RecipeModel) -> RecipeModel:
-        """Insert a recipe into the database.
+        """Insert a recipe into the database, unless one with the same name (ignoring
+        case) exists.
         Args:
             recipe (RecipeModel): Recipe model
+        Returns:
+            RecipeModel: The inserted recipe with its new ids, None if not inserted
         """
         print(f"Inserting {recipe.name} into {self.collection_name}")
-
-        # If the recipe has name, lets check if it already exists
-        if recipe.name:
-            existing = self.get_by_name(recipe.name)
-            if existing.recipes:
-                print(f"Recipe {recipe.name} already exists")
-                return None
-
-        # If the recipe has an id, lets check if it already exists
-        if recipe.id:
-            existing = self.get(recipe.id)
-            if existing:
-                print(f"Recipe {recipe.id} already exists")
-                return None
-
         try:
-            # Update the recipe with a new id
+            # Give the recipe and everything in it a new id
             recipe.id = str(uuid.uuid4())
+            assign_ids(recipe)
 
-            # check that all notes have an id
-            for note in recipe.notes:
-                if note.id is None:
-                    note.id = str(uuid.uuid4())
-            # check that all ingredients have an id
-            for ingredient in recipe.ingredients:
-                if ingredient.id is None:
-                    ingredient.id = str(uuid.uuid4())
-            # check that all instructions have an id
-            for instruction in recipe.instructions:
-                if instruction.id is None:
-                    instruction.id = str(uuid.uuid4())
-
-            # Insert the recipe into the collection
+            # The unique indexes reject duplicates, no need to look first
             self.collection.insert_one(recipe.dict())
-
-            # Pull the recipe from the collection
-            return self.collection.find_one({"id": recipe.id})
+            return recipe
+        except pymongo.errors.DuplicateKeyError:
+            print(f"Recipe {recipe.name} already exists")
+            return None
         except Exception as e:
             print(f"Error inserting {recipe.name}: {e}")
             return None
 
     def add_recipes(self, recipes: List[RecipeModel]) -> List[RecipeModel]:
-        """Insert a list of recipes into the database.
+        """Insert a list of recipes into the database in one unordered insert_many,
+        skipping those whose name already exists.
         Args:
             recipes (list[RecipeModel]): List of recipe models
+        Returns:
+            list[RecipeModel]: The recipes that were inserted, with their new ids
         """
         print(f"Inserting {len(recipes)} recipes into {self.collection_name}")
+        if not recipes:
+            return []
+        for recipe in recipes:
+            recipe.id = str(uuid.uuid4())
+            assign_ids(recipe)
+
         try:
-            for recipe in recipes:
-                self.add_recipe(recipe)
+            self.collection.insert_many(
+                [recipe.dict() for recipe in recipes], ordered=False
+            )
             return recipes
+        except pymongo.errors.BulkWriteError as e:
+            failed = set()
+            for error in e.details["writeErrors"]:
+                failed.add(error["index"])
+                print(
+                    f"Error inserting {recipes[error['index']].name}: {error['errmsg']}"
+                )
+            return [recipe for i, recipe in enumerate(recipes) if i not in failed]
         except Exception as e:
             print(f"Error inserting {len(recipes)} recipes: {e}")
-            return None
+            return []
 
     def add_instruction(self, recipe_id: str, instruction: Instruction) -> Instruction:
         """Adds a single instruction to a recipe.
@@ -192,8 +388,17 @@ class RecipeManager:
         """
         print(f"Adding {len(instructions)} instructions to {recipe_id}")
         try:
+            # give each a new id and push them all in one update
             for instruction in instructions:
-                self.add_instruction(recipe_id, instruction)
+                instruction.id = str(uuid.uuid4())
+            self.collection.update_one(
+                {"id": recipe_id},
+                {
+                    "$push": {
+                        "instructions": {"$each": [i.dict() for i in instructions]}
+                    }
+                },
+            )
             return instructions
         except Exception as e:
             print(f"Error adding {len(instructions)} instructions to {recipe_id}: {e}")
@@ -230,8 +435,13 @@ class RecipeManager:
         """
         print(f"Adding {len(ingredients)} ingredients to {recipe_id}")
         try:
+            # give each a new id and push them all in one update
             for ingredient in ingredients:
-                self.add_ingredient(recipe_id, ingredient)
+                ingredient.id = str(uuid.uuid4())
+            self.collection.update_one(
+                {"id": recipe_id},
+                {"$push": {"ingredients": {"$each": [i.dict() for i in ingredients]}}},
+            )
             return ingredients
         except Exception as e:
             print(f"Error adding {len(ingredients)} ingredients to {recipe_id}: {e}")
@@ -266,8 +476,13 @@ class RecipeManager:
         """
         print(f"Adding {len(notes)} notes to {recipe_id}")
         try:
+            # give each a new id and push them all in one update
             for note in notes:
-                self.add_note(recipe_id, note)
+                note.id = str(uuid.uuid4())
+            self.collection.update_one(
+                {"id": recipe_id},
+                {"$push": {"notes": {"$each": [n.dict() for n in notes]}}},
+            )
             return notes
         except Exception as e:
             print(f"Error adding {len(notes)} notes to {recipe_id}: {e}")
@@ -284,20 +499,8 @@ class RecipeManager:
         """
         print(f"Updating recipe {recipe.name}")
         try:
-            # check that all notes have an id
-            for note in recipe.notes:
-                if note.id is None:
-                    note.id = str(uuid.uuid4())
-
-            # check that all ingredients have an id
-            for ingredient in recipe.ingredients:
-                if ingredient.id is None:
-                    ingredient.id = str(uuid.uuid4())
-
-            # check that all instructions have an id
-            for instruction in recipe.instructions:
-                if instruction.id is None:
-                    instruction.id = str(uuid.uuid4())
+            # check that all notes, ingredients and instructions have an id
+            assign_ids(recipe)
 
             # update the recipe in the collection
             self.collection.update_one({"id": recipe.id}, {"$set": recipe.dict()})
@@ -320,21 +523,10 @@ class RecipeManager:
             if instruction.id is None:
                 instruction.id = str(uuid.uuid4())
 
-            # update the instruction in the collection
-            if instruction.id in [i.id for i in recipe.instructions]:
-                self.collection.update_one(
-                    {"id": recipe.id, "instructions.id": instruction.id},
-                    {"$set": {"instructions.$": instruction.dict()}},
-                    upsert=True,
-                )
-            # if the instruction does not exist, add it
-            else:
-                self.collection.update_one(
-                    {"id": recipe.id},
-                    {"$push": {"instructions": instruction.dict()}},
-                    upsert=True,
-                )
-
+            # replace it if the recipe has it, otherwise add it
+            self.collection.update_one(
+                {"id": recipe.id}, build_merge_update("instructions", [instruction])
+            )
             return instruction
         except Exception as e:
             print(f"Error updating instruction {instruction}: {e}")
@@ -349,8 +541,13 @@ class RecipeManager:
         """
         print(f"Updating {len(instructions)} instructions")
         try:
+            # give new instructions an id, then merge them all in one update
             for instruction in instructions:
-                self.update_instruction(recipe, instruction)
+                if instruction.id is None:
+                    instruction.id = str(uuid.uuid4())
+            self.collection.update_one(
+                {"id": recipe.id}, build_merge_update("instructions", instructions)
+            )
             return instructions
         except Exception as e:
             print(f"Error updating {len(instructions)} instructions: {e}")
@@ -369,20 +566,10 @@ class RecipeManager:
             if ingredient.id is None:
                 ingredient.id = str(uuid.uuid4())
 
-            # update the ingredient in the collection
-            if ingredient.id in [i.id for i in recipe.ingredients]:
-                self.collection.update_one(
-                    {"id": recipe.id, "ingredients.id": ingredient.id},
-                    {"$set": {"ingredients.$": ingredient.dict()}},
-                    upsert=True,
-                )
-            # if the ingredient does not exist, add it
-            else:
-                self.collection.update_one(
-                    {"id": recipe.id},
-                    {"$push": {"ingredients": ingredient.dict()}},
-                    upsert=True,
-                )
+            # replace it if the recipe has it, otherwise add it
+            self.collection.update_one(
+                {"id": recipe.id}, build_merge_update("ingredients", [ingredient])
+            )
             return ingredient
         except Exception as e:
             print(f"Error updating ingredient {ingredient}: {e}")
@@ -397,8 +584,13 @@ class RecipeManager:
         """
         print(f"Updating {len(ingredients)} ingredients")
         try:
+            # give new ingredients an id, then merge them all in one update
             for ingredient in ingredients:
-                self.update_ingredient(recipe, ingredient)
+                if ingredient.id is None:
+                    ingredient.id = str(uuid.uuid4())
+            self.collection.update_one(
+                {"id": recipe.id}, build_merge_update("ingredients", ingredients)
+            )
             return ingredients
         except Exception as e:
             print(f"Error updating {len(ingredients)} ingredients: {e}")
@@ -415,20 +607,10 @@ class RecipeManager:
             if note.id is None:
                 note.id = str(uuid.uuid4())
 
-            # update the note in the collection
-            if note.id in [n.id for n in recipe.notes]:
-                self.collection.update_one(
-                    {"id": recipe.id, "notes.id": note.id},
-                    {"$set": {"notes.$": note.dict()}},
-                    upsert=True,
-                )
-            # if the note does not exist, add it
-            else:
-                self.collection.update_one(
-                    {"id": recipe.id},
-                    {"$push": {"notes": note.dict()}},
-                    upsert=True,
-                )
+            # replace it if the recipe has it, otherwise add it
+            self.collection.update_one(
+                {"id": recipe.id}, build_merge_update("notes", [note])
+            )
             return note
         except Exception as e:
             print(f"Error updating note {note}: {e}")
@@ -441,8 +623,13 @@ class RecipeManager:
         """
         print(f"Updating {len(notes)} notes")
         try:
+            # give new notes an id, then merge them all in one update
             for note in notes:
-                self.update_note(recipe, note)
+                if note.id is None:
+                    note.id = str(uuid.uuid4())
+            self.collection.update_one(
+                {"id": recipe.id}, build_merge_update("notes", notes)
+            )
             return notes
         except Exception as e:
             print(f"Error updating {len(notes)} notes: {e}")
@@ -69,3 +69,20 @@ class RecipesModel(BaseModel):
     """Recipes Model"""
 
     recipes: List[RecipeModel] = []
+
+
+class RecipeSearchResult(BaseModel):
+    """A recipe matching an ingredient search"""
+
+    recipe: RecipeModel
+
+    # share of the recipe's ingredients that were searched for, 0 to 1
+    coverage: float
+    matched: int
+    missing: List[str] = []
+
+
+class RecipeSearchModel(BaseModel):
+    """Recipe Search Model, best coverage first"""
+
+    results: List[RecipeSearchResult] = []
@@ -2,20 +2,21 @@
 import logging
 from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from places.service.recipes.manager import get_manager as get_recipes_manager
+from places.service.dependencies import get_recipes_manager
+from places.service.recipes.manager import RecipeManager
 from places.service.recipes.models import Ingredient, Instruction, Note, RecipeModel
 
 # Constants
-recipes_manager = get_recipes_manager()
-
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.post("/recipes/add")
-def add_recipe(recipe: RecipeModel) -> RecipeModel:
+def add_recipe(
+    recipe: RecipeModel, recipes_manager: RecipeManager = Depends(get_recipes_manager)
+) -> RecipeModel:
     """Add a recipe to the database.
 
     Args:
@@ -26,7 +27,10 @@ def add_recipe(recipe: RecipeModel) -> RecipeModel:
 
 
 @router.post("/recipes/add/many")
-def add_recipes(recipes: List[RecipeModel]) -> List[RecipeModel]:
+def add_recipes(
+    recipes: List[RecipeModel],
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> List[RecipeModel]:
     """Add many recipes to the database.
 
     Args:
@@ -37,7 +41,11 @@ def add_recipes(recipes: List[RecipeModel]) -> List[RecipeModel]:
 
 
 @router.post("/instruction/add")
-def add_instruction(recipe_id: str, instruction: Instruction) -> Instruction:
+def add_instruction(
+    recipe_id: str,
+    instruction: Instruction,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> Instruction:
     """Add an instruction to the database.
 
     Args:
@@ -49,7 +57,9 @@ def add_instruction(recipe_id: str, instruction: Instruction) -> Instruction:
 
 @router.post("/instruction/add/many")
 def add_instructions(
-    recipe_id: str, instructions: List[Instruction]
+    recipe_id: str,
+    instructions: List[Instruction],
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
 ) -> List[Instruction]:
     """Add many instructions to the database.
 
@@ -63,7 +73,11 @@ def add_instructions(
 
 
 @router.post("/ingredient/add")
-def add_ingredient(recipe_id: str, ingredient: Ingredient) -> Ingredient:
+def add_ingredient(
+    recipe_id: str,
+    ingredient: Ingredient,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> Ingredient:
     """Add an ingredient to the database.
 
     Args:
@@ -74,7 +88,11 @@ def add_ingredient(recipe_id: str, ingredient: Ingredient) -> Ingredient:
 
 
 @router.post("/ingredient/add/many")
-def add_ingredients(recipe_id: str, ingredients: List[Ingredient]) -> List[Ingredient]:
+def add_ingredients(
+    recipe_id: str,
+    ingredients: List[Ingredient],
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> List[Ingredient]:
     """Add many ingredients to the database.
 
     Args:
@@ -85,7 +103,11 @@ def add_ingredients(recipe_id: str, ingredients: List[Ingredient]) -> List[Ingre
 
 
 @router.post("/note/add")
-def add_note(recipe_id: str, note: Note) -> Note:
+def add_note(
+    recipe_id: str,
+    note: Note,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> Note:
     """Add a note to the database.
 
     Args:
@@ -96,7 +118,11 @@ def add_note(recipe_id: str, note: Note) -> Note:
 
 
 @router.post("/note/add/many")
-def add_notes(recipe_id: str, notes: List[Note]) -> List[Note]:
+def add_notes(
+    recipe_id: str,
+    notes: List[Note],
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> List[Note]:
     """Add many notes to the database.
 
     Args:
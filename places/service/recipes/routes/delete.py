@@ -1,19 +1,20 @@
 # Standard
 import logging
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from places.service.recipes.manager import get_manager as get_recipes_manager
+from places.service.dependencies import get_recipes_manager
+from places.service.recipes.manager import RecipeManager
 
 # Constants
-recipes_manager = get_recipes_manager()
-
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.delete("/recipes/delete")
-def delete_recipe(recipe_id: str) -> None:
+def delete_recipe(
+    recipe_id: str, recipes_manager: RecipeManager = Depends(get_recipes_manager)
+) -> None:
     """Delete a recipe from the database.
 
     Args:
@@ -24,7 +25,11 @@ def delete_recipe(recipe_id: str) -> None:
 
 
 @router.delete("/instruction/delete")
-def delete_instruction(recipe_id: str, instruction_id: str) -> None:
+def delete_instruction(
+    recipe_id: str,
+    instruction_id: str,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> None:
     """Delete an instruction from the database.
 
     Args:
@@ -38,7 +43,11 @@ def delete_instruction(recipe_id: str, instruction_id: str) -> None:
 
 
 @router.delete("/ingredient/delete")
-def delete_ingredient(recipe_id: str, ingredient_id: str) -> None:
+def delete_ingredient(
+    recipe_id: str,
+    ingredient_id: str,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> None:
     """Delete an ingredient from the database.
 
     Args:
@@ -52,7 +61,11 @@ def delete_ingredient(recipe_id: str, ingredient_id: str) -> None:
 
 
 @router.delete("/note/delete")
-def delete_note(recipe_id: str, note_id: str) -> None:
+def delete_note(
+    recipe_id: str,
+    note_id: str,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> None:
     """Delete a note from the database.
 
     Args:
@@ -1,31 +1,76 @@
 # Standard
 import logging
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 
-from places.service.recipes.manager import get_manager as get_recipes_manager
-from places.service.recipes.models import RecipeModel, RecipesModel
+from constants import RECIPES_SEARCH_LIMIT, RECIPES_SEARCH_MAX_LIMIT
+from places.service.dependencies import get_recipes_manager
+from places.service.recipes.manager import RecipeManager
+from places.service.recipes.models import (
+    RecipeModel,
+    RecipeSearchModel,
+    RecipesModel,
+)
+from places.service.stream_utils import ndjson_response, wants_ndjson
 
 # Constants
-recipes_manager = get_recipes_manager()
-
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.get("/recipes/all")
-def get_all() -> RecipesModel:
+def get_all(
+    stream: bool = False,
+    accept: Optional[str] = Header(None),
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> RecipesModel:
     """Get all recipes from the database.
 
     Args:
-        recipe (RecipeModel): Recipe to add to the database
+        stream (bool, optional): Stream one recipe per line as NDJSON instead, also
+            used if the Accept header asks for application/x-ndjson. Defaults to False.
     """
+    if wants_ndjson(stream=stream, accept=accept):
+        print(f"Streaming all recipes")
+        return ndjson_response(recipes_manager.iter_all())
+
     print(f"Getting all recipes")
     return recipes_manager.get_all()
 
 
+@router.get("/recipes/search")
+def search(
+    ingredients: List[str] = Query(...),
+    limit: int = RECIPES_SEARCH_LIMIT,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> RecipeSearchModel:
+    """Find recipes to cook with the ingredients you have, the recipes with the
+    largest share of their ingredients covered first.
+
+    Args:
+        ingredients (List[str]): Ingredient names, repeated
+            (?ingredients=a&ingredients=b) or comma separated (?ingredients=a,b)
+        limit (int, optional): Maximum number of recipes. Defaults to RECIPES_SEARCH_LIMIT.
+    """
+    ingredients = [name for names in ingredients for name in names.split(",")]
+    ingredients = [name for name in ingredients if name.strip()]
+    if not ingredients:
+        raise HTTPException(status_code=400, detail="Please provide ingredients")
+    if not 0 < limit <= RECIPES_SEARCH_MAX_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Please provide a limit between 1 and {RECIPES_SEARCH_MAX_LIMIT}",
+        )
+
+    print(f"Searching recipes for {ingredients}")
+    return recipes_manager.search(ingredients=ingredients, limit=limit)
+
+
 @router.get("/recipes/{recipe_id}")
-def get(recipe_id: str) -> RecipeModel:
+def get(
+    recipe_id: str, recipes_manager: RecipeManager = Depends(get_recipes_manager)
+) -> RecipeModel:
     """Get a recipe from the database.
 
     Args:
@@ -36,7 +81,9 @@ def get(recipe_id: str) -> RecipeModel:
 
 
 @router.get("/recipes/name/{name}")
-def get_by_name(name: str) -> RecipesModel:
+def get_by_name(
+    name: str, recipes_manager: RecipeManager = Depends(get_recipes_manager)
+) -> RecipesModel:
     """Get a recipe from the database.
 
     Args:
@@ -2,19 +2,18 @@
 import logging
 from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from places.service.recipes.manager import get_manager as get_recipes_manager
+from places.service.dependencies import get_recipes_manager
+from places.service.recipes.manager import RecipeManager
 from places.service.recipes.models import Ingredient, Instruction, Note, RecipeModel
 
 # Constants
-recipes_manager = get_recipes_manager()
-
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def get_recipe_maybe(recipe_id: str) -> RecipeModel:
+def get_recipe_maybe(recipe_id: str, recipes_manager: RecipeManager) -> RecipeModel:
     """Get a recipe from the database or raise an error.
 
     Args:
@@ -27,7 +26,9 @@ def get_recipe_maybe(recipe_id: str) -> RecipeModel:
 
 
 @router.put("/recipes/update")
-def update_recipe(recipe: RecipeModel) -> RecipeModel:
+def update_recipe(
+    recipe: RecipeModel, recipes_manager: RecipeManager = Depends(get_recipes_manager)
+) -> RecipeModel:
     """Update a recipe in the database.
 
     Args:
@@ -38,7 +39,11 @@ def update_recipe(recipe: RecipeModel) -> RecipeModel:
 
 
 @router.put("/instruction/update")
-def update_instruction(recipe_id: str, instruction: Instruction) -> Instruction:
+def update_instruction(
+    recipe_id: str,
+    instruction: Instruction,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> Instruction:
     """Update an instruction in the database.
 
     Args:
@@ -46,13 +51,16 @@ def update_instruction(recipe_id: str, instruction: Instruction) -> Instruction:
     """
     print(f"Updating instruction {instruction}")
     return recipes_manager.update_instruction(
-        recipe=get_recipe_maybe(recipe_id=recipe_id), instruction=instruction
+        recipe=get_recipe_maybe(recipe_id=recipe_id, recipes_manager=recipes_manager),
+        instruction=instruction,
     )
 
 
 @router.put("/instruction/update/many")
 def update_instructions(
-    recipe_id: str, instructions: List[Instruction]
+    recipe_id: str,
+    instructions: List[Instruction],
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
 ) -> List[Instruction]:
     """Update a list of instructions in the database.
 
@@ -61,12 +69,17 @@ def update_instructions(
     """
     print(f"Updating {len(instructions)} instructions")
     return recipes_manager.update_instrucitons(
-        recipe=get_recipe_maybe(recipe_id=recipe_id), instructions=instructions
+        recipe=get_recipe_maybe(recipe_id=recipe_id, recipes_manager=recipes_manager),
+        instructions=instructions,
     )
 
 
 @router.put("/ingredient/update")
-def update_ingredient(recipe_id: str, ingredient: Ingredient) -> Ingredient:
+def update_ingredient(
+    recipe_id: str,
+    ingredient: Ingredient,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> Ingredient:
     """Update an ingredient in the database.
 
     Args:
@@ -74,13 +87,16 @@ def update_ingredient(recipe_id: str, ingredient: Ingredient) -> Ingredient:
     """
     print(f"Updating ingredient {ingredient}")
     return recipes_manager.update_ingredient(
-        recipe=get_recipe_maybe(recipe_id=recipe_id), ingredient=ingredient
+        recipe=get_recipe_maybe(recipe_id=recipe_id, recipes_manager=recipes_manager),
+        ingredient=ingredient,
     )
 
 
 @router.put("/ingredient/update/many")
 def update_ingredients(
-    recipe_id: str, ingredients: List[Ingredient]
+    recipe_id: str,
+    ingredients: List[Ingredient],
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
 ) -> List[Ingredient]:
     """Update a list of ingredients in the database.
 
@@ -89,12 +105,17 @@ def update_ingredients(
     """
     print(f"Updating {len(ingredients)} ingredients")
     return recipes_manager.update_ingredients(
-        recipe=get_recipe_maybe(recipe_id=recipe_id), ingredients=ingredients
+        recipe=get_recipe_maybe(recipe_id=recipe_id, recipes_manager=recipes_manager),
+        ingredients=ingredients,
     )
 
 
 @router.put("/note/update")
-def update_note(recipe_id: str, note: Note) -> Note:
+def update_note(
+    recipe_id: str,
+    note: Note,
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> Note:
     """Update a note in the database.
 
     Args:
@@ -102,12 +123,17 @@ def update_note(recipe_id: str, note: Note) -> Note:
     """
     print(f"Updating note {note}")
     return recipes_manager.update_note(
-        recipe=get_recipe_maybe(recipe_id=recipe_id), note=note
+        recipe=get_recipe_maybe(recipe_id=recipe_id, recipes_manager=recipes_manager),
+        note=note,
     )
 
 
 @router.put("/note/update/many")
-def update_notes(recipe_id: str, notes: List[Note]) -> List[Note]:
+def update_notes(
+    recipe_id: str,
+    notes: List[Note],
+    recipes_manager: RecipeManager = Depends(get_recipes_manager),
+) -> List[Note]:
     """Update a list of notes in the database.
 
     Args:
@@ -115,5 +141,6 @@ def update_notes(recipe_id: str, notes: List[Note]) -> List[Note]:
     """
     print(f"Updating {len(notes)} notes")
     return recipes_manager.update_notes(
-        recipe=get_recipe_maybe(recipe_id=recipe_id), notes=notes
+        recipe=get_recipe_maybe(recipe_id=recipe_id, recipes_manager=recipes_manager),
+        notes=notes,
     )
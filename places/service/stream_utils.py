@@ -0,0 +1,30 @@
+from typing import AsyncIterator, Iterator, Optional, Union
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(stream: bool = False, accept: Optional[str] = None) -> bool:
+    """Whether the client asked for a streamed NDJSON response"""
+    return stream or (accept is not None and NDJSON_MEDIA_TYPE in accept)
+
+
+def ndjson_response(
+    models: Union[Iterator[BaseModel], AsyncIterator[BaseModel]],
+) -> StreamingResponse:
+    """Stream models one JSON document per line, as they are read from the cursor"""
+    if hasattr(models, "__aiter__"):
+
+        async def lines():
+            async for model in models:
+                yield model.model_dump_json() + "\n"
+
+    else:
+
+        def lines():
+            for model in models:
+                yield model.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
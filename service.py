@@ -8,21 +8,26 @@ Then open your browser and go to:
 """
 
 import argparse
+import asyncio
 import logging
 
 # Standard Library
 import os
 
+from contextlib import asynccontextmanager
+
 import uvicorn
 
 from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
+from constants import PLACES_NEXT_PAGE_HEADER, SERVICE_WARM_UP_TIMEOUT_SECONDS
+
 # Comments Routes
 from places.service.comments.routes.comments import router as comments_routes
 
-
-from places.service.places.manager import PlacesManager
+from places.service.dependencies import warm_up
 
 # Places Routes
 from places.service.places.routes.add import router as add_places_routes
@@ -35,8 +40,27 @@ from places.service.recipes.routes.delete import router as delete_recipes_routes
 from places.service.recipes.routes.get import router as get_recipes_routes
 from places.service.recipes.routes.update import router as update_recipes_routes
 
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect the managers before serving, waiting at most
+    SERVICE_WARM_UP_TIMEOUT_SECONDS. If Mongo or Redis is slow or down the service
+    starts anyway, the warm up carries on in its thread and the first requests
+    wait on the same locked singletons rather than creating their own."""
+    try:
+        await asyncio.wait_for(
+            run_in_threadpool(warm_up), timeout=SERVICE_WARM_UP_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logger.warning(f"Starting before the managers are ready: {e!r}")
+    yield
+
+
 # Initialize FastAPI App
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add Places Endpoints
 app.include_router(add_places_routes)
@@ -60,12 +84,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PLACES_NEXT_PAGE_HEADER],
 )
 
-# Initialize manager and logger
-manager = PlacesManager()
-logger = logging.getLogger(__name__)
-
 
 def configure_logging(level: int = logging.INFO):
     level = logging.DEBUG if os.environ.get("LOG_VERBOSE") is None else logging.INFO
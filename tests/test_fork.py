@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+import places.cache.cache as cache
+import places.service.comments.manager as comments_manager
+import places.service.places.async_manager as async_manager
+import places.service.places.manager as places_manager
+import places.service.recipes.manager as recipes_manager
+
+MANAGER_MODULES = [places_manager, async_manager, comments_manager, recipes_manager]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_forgets_singletons(monkeypatch):
+    """A worker forked from a process with managers (e.g. gunicorn --preload)
+    does not reuse their clients"""
+    for module in MANAGER_MODULES:
+        monkeypatch.setattr(module, "_MANAGER_SINGLETON", object())
+    monkeypatch.setattr(cache, "redis_client", object())
+    monkeypatch.setattr(cache, "places_cache", object())
+
+    pid = os.fork()
+    if pid == 0:
+        reset = all(module._MANAGER_SINGLETON is None for module in MANAGER_MODULES)
+        reset = reset and cache.redis_client is None and cache.places_cache is None
+        os._exit(0 if reset else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert all(module._MANAGER_SINGLETON is not None for module in MANAGER_MODULES)
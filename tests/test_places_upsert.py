@@ -0,0 +1,58 @@
+import uuid
+
+import pytest
+
+from places.service.places.manager import PlacesManager
+from places.service.places.models import Place
+
+
+def make_place(name: str, place_id: str) -> Place:
+    location = {"lat": 40.7, "lng": -73.9}
+    return Place(
+        id=str(uuid.uuid4()),
+        business_status="OPERATIONAL",
+        formatted_address="1 Main St, New York, NY 10014",
+        geometry={
+            "location": location,
+            "viewport": {"northeast": location, "southwest": location},
+        },
+        icon_background_color="#FF9E67",
+        icon_mask_base_uri="https://maps.gstatic.com/mapfiles/place_api/icons/v2",
+        name=name,
+        place_id=place_id,
+        plus_code={"compound_code": "PXQ4+4J New York", "global_code": "87G8PXQ4+4J"},
+        reference=place_id,
+        types=["restaurant"],
+        user_ratings_total=10,
+        rating=4.5,
+        price_level=2,
+    )
+
+
+@pytest.fixture
+def manager():
+    mongomock = pytest.importorskip("mongomock")
+    manager = PlacesManager.__new__(PlacesManager)
+    manager.collection_name = "places"
+    manager.collection = mongomock.MongoClient().db.places
+    manager.invalidations = 0
+
+    def invalidate_cache():
+        manager.invalidations += 1
+
+    manager.invalidate_cache = invalidate_cache
+    return manager
+
+
+def test_upsert_returns_stored_place_without_overwriting(manager):
+    """The first upsert inserts, a repeat returns the stored place untouched"""
+    stored, inserted = manager.upsert(make_place("Joe's Pizza", "ChIJ1"))
+    assert inserted
+    assert manager.invalidations == 1
+
+    again, inserted = manager.upsert(make_place("Renamed", "ChIJ1"))
+    assert not inserted
+    assert again.id == stored.id
+    assert again.name == "Joe's Pizza"
+    assert manager.invalidations == 1
+    assert manager.collection.count_documents({}) == 1
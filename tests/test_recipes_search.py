@@ -0,0 +1,36 @@
+import pytest
+
+from places.service.recipes.manager import build_search_pipeline
+
+
+def test_search_pipeline_ingredients_are_literal():
+    """An ingredient starting with $ is compared as a name, not read as a field
+    path or variable by the ranking expression"""
+    ingredients = ["$$x", "$name", "egg"]
+    pipeline = build_search_pipeline(ingredients=ingredients, limit=10)
+
+    match, add_missing = pipeline[0], pipeline[1]
+    assert match == {"$match": {"ingredients.name": {"$in": ingredients}}}
+    have = add_missing["$addFields"]["missing"]["$map"]["input"]["$filter"]["cond"]
+    assert have == {
+        "$not": {"$in": [{"$toLower": "$$this.name"}, {"$literal": ingredients}]}
+    }
+
+
+def test_search_pipeline_runs_with_dollar_ingredient():
+    """A $-prefixed ingredient matches nothing instead of failing the aggregation"""
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.recipes
+    collection.insert_many(
+        [
+            {"name": "omelette", "ingredients": [{"name": "egg"}, {"name": "milk"}]},
+            {"name": "$name", "ingredients": [{"name": "$name"}, {"name": "salt"}]},
+        ]
+    )
+    pipeline = build_search_pipeline(ingredients=["$$x", "$name", "egg"], limit=10)
+    results = {doc["name"]: doc for doc in collection.aggregate(pipeline)}
+
+    assert results["omelette"]["matched"] == 1
+    assert results["omelette"]["missing"] == ["milk"]
+    assert results["$name"]["matched"] == 1
+    assert results["$name"]["missing"] == ["salt"]
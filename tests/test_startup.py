@@ -0,0 +1,47 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import places.cache.cache as cache
+import places.service.comments.manager as comments_manager
+import places.service.mongo_utils as mongo_utils
+import places.service.places.async_manager as async_manager
+import places.service.places.manager as places_manager
+import places.service.recipes.manager as recipes_manager
+import service
+
+# Never answers, so connecting waits for the timeouts below
+UNREACHABLE_HOST = "10.255.255.1"
+WARM_UP_TIMEOUT_SECONDS = 1
+
+
+@pytest.fixture
+def unreachable(monkeypatch):
+    """Point Mongo and Redis at a host that never answers, with Mongo giving up
+    after the warm up timeout so the test does not leave a thread behind"""
+    for module in [places_manager, async_manager, comments_manager, recipes_manager]:
+        monkeypatch.setattr(module, "_MANAGER_SINGLETON", None)
+    monkeypatch.setattr(cache, "redis_client", None)
+    monkeypatch.setattr(cache, "places_cache", None)
+    monkeypatch.setattr(cache, "REDIS_HOST", UNREACHABLE_HOST)
+    monkeypatch.setattr(mongo_utils, "clients", {})
+    monkeypatch.setattr(mongo_utils, "MONGO_URI", f"mongodb://{UNREACHABLE_HOST}")
+    monkeypatch.setattr(mongo_utils, "MONGO_CONNECT_TIMEOUT_MS", 2000)
+    monkeypatch.setattr(mongo_utils, "MONGO_SERVER_SELECTION_TIMEOUT_MS", 2000)
+    monkeypatch.setattr(
+        service, "SERVICE_WARM_UP_TIMEOUT_SECONDS", WARM_UP_TIMEOUT_SECONDS
+    )
+
+
+def test_startup_is_bounded_when_unreachable(unreachable):
+    """The service starts within the warm up timeout and serves routes that do not
+    need Mongo or Redis"""
+    start = time.perf_counter()
+    with TestClient(service.app) as client:
+        elapsed = time.perf_counter() - start
+        assert elapsed < WARM_UP_TIMEOUT_SECONDS + 0.5
+
+        response = client.get("/mongo/stats")
+        assert response.status_code == 200
+        assert client.get("/openapi.json").status_code == 200